@@ -0,0 +1,38 @@
+"""materialized view_entries table
+
+Revision ID: 0b7c2e91d4a3
+Revises: f6fb4555607a
+Create Date: 2026-10-16 23:20:41.503127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7c2e91d4a3'
+down_revision: Union[str, Sequence[str], None] = 'f6fb4555607a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('view_entries',
+    sa.Column('generation', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('calendar', sa.String(), nullable=True),
+    sa.Column('detail', sa.String(), nullable=True),
+    sa.Column('color', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('generation', 'token', 'position', 'task_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('view_entries')
@@ -0,0 +1,94 @@
+"""baseline schema: placeholders, snapshots and tasks
+
+Revision ID: 3a9d1c6e2b70
+Revises: 
+Create Date: 2026-10-17 09:12:03.481226
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9d1c6e2b70'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('placeholders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_placeholders_id'), 'placeholders', ['id'], unique=False)
+    op.create_index(op.f('ix_placeholders_name'), 'placeholders', ['name'], unique=False)
+    op.create_table('snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('commit_hash', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('log', sa.String(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_snapshots_id'), 'snapshots', ['id'], unique=False)
+    op.create_table('tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('todo', sa.String(), nullable=True),
+    sa.Column('scheduled_start_date', sa.String(), nullable=True),
+    sa.Column('scheduled_start_time', sa.String(), nullable=True),
+    sa.Column('scheduled_end_date', sa.String(), nullable=True),
+    sa.Column('scheduled_end_time', sa.String(), nullable=True),
+    sa.Column('scheduled_all_day', sa.Boolean(), nullable=True),
+    sa.Column('scheduled_repeater_type', sa.String(), nullable=True),
+    sa.Column('scheduled_repeater_value', sa.Integer(), nullable=True),
+    sa.Column('scheduled_repeater_unit', sa.String(), nullable=True),
+    sa.Column('scheduled_warning_type', sa.String(), nullable=True),
+    sa.Column('scheduled_warning_value', sa.Integer(), nullable=True),
+    sa.Column('scheduled_warning_unit', sa.String(), nullable=True),
+    sa.Column('deadline_start_date', sa.String(), nullable=True),
+    sa.Column('deadline_start_time', sa.String(), nullable=True),
+    sa.Column('deadline_end_date', sa.String(), nullable=True),
+    sa.Column('deadline_end_time', sa.String(), nullable=True),
+    sa.Column('deadline_all_day', sa.Boolean(), nullable=True),
+    sa.Column('deadline_repeater_type', sa.String(), nullable=True),
+    sa.Column('deadline_repeater_value', sa.Integer(), nullable=True),
+    sa.Column('deadline_repeater_unit', sa.String(), nullable=True),
+    sa.Column('deadline_warning_type', sa.String(), nullable=True),
+    sa.Column('deadline_warning_value', sa.Integer(), nullable=True),
+    sa.Column('deadline_warning_unit', sa.String(), nullable=True),
+    sa.Column('ts_start_date', sa.String(), nullable=True),
+    sa.Column('ts_start_time', sa.String(), nullable=True),
+    sa.Column('ts_end_date', sa.String(), nullable=True),
+    sa.Column('ts_end_time', sa.String(), nullable=True),
+    sa.Column('ts_all_day', sa.Boolean(), nullable=True),
+    sa.Column('ts_repeater_type', sa.String(), nullable=True),
+    sa.Column('ts_repeater_value', sa.Integer(), nullable=True),
+    sa.Column('ts_repeater_unit', sa.String(), nullable=True),
+    sa.Column('ts_warning_type', sa.String(), nullable=True),
+    sa.Column('ts_warning_value', sa.Integer(), nullable=True),
+    sa.Column('ts_warning_unit', sa.String(), nullable=True),
+    sa.Column('tags', sa.String(), nullable=True),
+    sa.Column('file', sa.String(), nullable=True),
+    sa.Column('parent', sa.String(), nullable=True),
+    sa.Column('kind', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tasks_id'), 'tasks', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tasks_id'), table_name='tasks')
+    op.drop_table('tasks')
+    op.drop_index(op.f('ix_snapshots_id'), table_name='snapshots')
+    op.drop_table('snapshots')
+    op.drop_index(op.f('ix_placeholders_name'), table_name='placeholders')
+    op.drop_index(op.f('ix_placeholders_id'), table_name='placeholders')
+    op.drop_table('placeholders')
@@ -0,0 +1,30 @@
+"""failed files of each generation
+
+Revision ID: 5d4e7a2c8f16
+Revises: 0b7c2e91d4a3
+Create Date: 2026-10-17 10:12:37.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d4e7a2c8f16'
+down_revision: Union[str, Sequence[str], None] = '0b7c2e91d4a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('generations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('failed_files', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('generations', schema=None) as batch_op:
+        batch_op.drop_column('failed_files')
@@ -0,0 +1,54 @@
+"""generations, task uids and the task_tags table
+
+Revision ID: 8e21f4b5c9d3
+Revises: 3a9d1c6e2b70
+Create Date: 2026-10-17 09:14:37.902115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e21f4b5c9d3'
+down_revision: Union[str, Sequence[str], None] = '3a9d1c6e2b70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('generations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('commit_hash', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_generations_id'), 'generations', ['id'], unique=False)
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('uid', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('generation', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index(batch_op.f('ix_tasks_generation'), ['generation'], unique=False)
+        batch_op.create_index('ix_tasks_generation_uid', ['generation', 'uid'], unique=False)
+    op.create_table('task_tags',
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('task_id', 'tag')
+    )
+    op.create_index('ix_task_tags_tag', 'task_tags', ['tag', 'task_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_tags_tag', table_name='task_tags')
+    op.drop_table('task_tags')
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_generation_uid')
+        batch_op.drop_index(batch_op.f('ix_tasks_generation'))
+        batch_op.drop_column('generation')
+        batch_op.drop_column('uid')
+    op.drop_index(op.f('ix_generations_id'), table_name='generations')
+    op.drop_table('generations')
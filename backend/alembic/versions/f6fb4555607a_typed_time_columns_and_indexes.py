@@ -0,0 +1,46 @@
+"""typed time columns and indexes on tasks
+
+Revision ID: f6fb4555607a
+Revises: 8e21f4b5c9d3
+Create Date: 2026-10-16 22:40:12.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6fb4555607a'
+down_revision: Union[str, Sequence[str], None] = '8e21f4b5c9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('start_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('end_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('scheduled_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('deadline_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_tasks_kind_start_at', ['kind', 'start_at'], unique=False)
+        batch_op.create_index('ix_tasks_file', ['file'], unique=False)
+        batch_op.create_index('ix_tasks_todo', ['todo'], unique=False)
+        batch_op.create_index('ix_tasks_scheduled_at', ['scheduled_at'], unique=False)
+        batch_op.create_index('ix_tasks_deadline_at', ['deadline_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_deadline_at')
+        batch_op.drop_index('ix_tasks_scheduled_at')
+        batch_op.drop_index('ix_tasks_todo')
+        batch_op.drop_index('ix_tasks_file')
+        batch_op.drop_index('ix_tasks_kind_start_at')
+        batch_op.drop_column('deadline_at')
+        batch_op.drop_column('scheduled_at')
+        batch_op.drop_column('end_at')
+        batch_op.drop_column('start_at')
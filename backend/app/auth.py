@@ -1,7 +1,7 @@
 from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from itsdangerous import URLSafeTimedSerializer, BadSignature
-import secrets, os, logging
+import hashlib, hmac, secrets, os, logging
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +10,7 @@ security = HTTPBasic()
 ADMIN_PASS = os.getenv("ADMIN_PASSWORD")
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me")
 SESSION_COOKIE = "session"
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
 
 # --- Serializer ---
 serializer = URLSafeTimedSerializer(SECRET_KEY)
@@ -52,6 +53,25 @@ def verify_admin_login(response: Response, creds: HTTPBasicCredentials = Depends
 def require_admin(request: Request):
     """Dependency guard for protected routes."""
     return verify_session(request)
+
+async def verify_webhook(request: Request) -> bytes:
+    """
+    Check a push webhook's HMAC-SHA256 signature against WEBHOOK_SECRET and
+    return the raw body. GitHub sends "sha256=<hex>" in X-Hub-Signature-256,
+    Gitea and Forgejo send the bare hex digest in X-Gitea-Signature.
+    """
+    if not WEBHOOK_SECRET:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook not configured")
+    body = await request.body()
+    signature = (
+        request.headers.get("x-hub-signature-256", "").removeprefix("sha256=")
+        or request.headers.get("x-gitea-signature", "")
+    )
+    expected = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    if not signature or not hmac.compare_digest(signature, expected):
+        logger.warning("Rejected webhook with a bad signature")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Bad signature")
+    return body
     
 # --- Deprecated ---
 
@@ -0,0 +1,132 @@
+"""
+Import and view benchmarks on a generated database.
+
+Tasks are generated deterministically and imported into a temporary
+SQLite file with the same pragmas as /data/db.sqlite, so the numbers
+quoted in commit messages can be reproduced:
+
+    python -m app.bench import --files 30 --per-file 2000
+    python -m app.bench tags --files 10 --per-file 10000
+    python -m app.bench incremental --files 10 --per-file 100
+
+`import` times full imports (rows/s), `tags` times materializing and
+reading views filtered on a common and a rare tag, and `incremental`
+times re-importing one file at a time while the rest is carried over.
+"""
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from . import db, parser
+from .models import Task, current_generation
+from .views import get_tasks_for_view, materialize_views, parse_views
+
+TAGS = ["Work", "Personal", "Family", "School", "Homework", "Errand", "Health", "Money"]
+RARE_TAG = "Rare" # On about 1% of tasks
+
+TAG_VIEWS = """
+(view :name "Common" :token "common" (calendar :name "Work" (query (tag "Work"))))
+(view :name "Rare" :token "rare" (calendar :name "Rare" (query (tag "Rare"))))
+"""
+
+def generate(files: int, per_file: int, seed: int = 3, version: int = 0) -> list[tuple[str, list[dict]]]:
+    """(file, tasks) pairs of PER_FILE tasks each, with 0-3 common tags and sometimes RARE_TAG."""
+    rng = random.Random(seed)
+    parsed = []
+    for i in range(files):
+        file = f"/data/repo/f{i}.org"
+        tasks = []
+        for j in range(per_file):
+            tags = rng.sample(TAGS, rng.randint(0, 3))
+            if rng.random() < 0.01:
+                tags.append(RARE_TAG)
+            day = f"2026-{j % 12 + 1:02d}-{j % 28 + 1:02d}"
+            tasks.append({
+                "title": f"t{i}-{j} v{version}",
+                "todo": "TODO",
+                "tags": tags,
+                "file": file,
+                "kind": "task",
+                "path": [f"h{j}"],
+                "scheduled_start_date": day,
+                "deadline_start_date": day,
+                "timestamp_start_date": day,
+                "timestamp_start_time": "10:00",
+            })
+        parsed.append((file, tasks))
+    return parsed
+
+def use_temporary_database(directory: str):
+    """Point the importer at a fresh database in DIRECTORY, returning its sessionmaker."""
+    engine = create_engine(f"sqlite:///{Path(directory) / 'bench.sqlite'}")
+    event.listen(engine, "connect", db.set_sqlite_pragmas)
+    db.Base.metadata.create_all(engine)
+    parser.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return parser.SessionLocal
+
+def bench_import(args):
+    rows = args.files * args.per_file
+    for n in range(args.rounds):
+        with tempfile.TemporaryDirectory() as directory:
+            use_temporary_database(directory)
+            parsed = generate(args.files, args.per_file)
+            started = time.perf_counter()
+            parser.replace_tasks(parsed)
+            elapsed = time.perf_counter() - started
+        print(f"round {n + 1}: {rows} rows in {elapsed:.2f}s, {rows / elapsed:,.0f} rows/s")
+
+def bench_tags(args):
+    views = parse_views(TAG_VIEWS)
+    with tempfile.TemporaryDirectory() as directory:
+        session_local = use_temporary_database(directory)
+        started = time.perf_counter()
+        parser.replace_tasks(generate(args.files, args.per_file))
+        print(f"import: {args.files * args.per_file} rows in {time.perf_counter() - started:.2f}s")
+        session = session_local()
+        try:
+            generation = current_generation(session)
+            for token in views:
+                started = time.perf_counter()
+                for _ in range(args.rounds):
+                    materialize_views(session, views, generation, [token])
+                materialized = (time.perf_counter() - started) / args.rounds
+                session.commit()
+                started = time.perf_counter()
+                for _ in range(args.rounds):
+                    entries = get_tasks_for_view(session, views, token)
+                read = (time.perf_counter() - started) / args.rounds
+                print(f"{token:>6}: {len(entries)} rows, materialize {materialized * 1000:.1f} ms, read {read * 1000:.1f} ms")
+        finally:
+            session.close()
+
+def bench_incremental(args):
+    with tempfile.TemporaryDirectory() as directory:
+        session_local = use_temporary_database(directory)
+        parsed = generate(args.files, args.per_file)
+        parser.replace_tasks(parsed)
+        started = time.perf_counter()
+        for n in range(args.rounds):
+            file, tasks = generate(args.files, args.per_file, version=n + 1)[n % args.files]
+            parser.replace_tasks([(file, tasks)], files=[file])
+        elapsed = (time.perf_counter() - started) / args.rounds
+        session = session_local()
+        try:
+            highest = session.scalar(select(func.max(Task.id)))
+        finally:
+            session.close()
+        print(f"{args.rounds} imports of one file: {elapsed * 1000:.1f} ms each, highest task id {highest}")
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("command", choices=["import", "tags", "incremental"])
+    arg_parser.add_argument("--files", type=int, default=10, help="Generated org files")
+    arg_parser.add_argument("--per-file", type=int, default=10000, help="Tasks per generated file")
+    arg_parser.add_argument("--rounds", type=int, default=3, help="Repetitions of each measurement")
+    args = arg_parser.parse_args()
+    {"import": bench_import, "tags": bench_tags, "incremental": bench_incremental}[args.command](args)
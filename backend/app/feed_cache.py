@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+class CachedFeed:
+    """One rendered feed, with the validators sent to clients."""
+
+    def __init__(self, key: tuple, body: bytes):
+        self.key = key
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "Cache-Control": "no-cache", # Clients may store it, but must revalidate
+        }
+
+    def not_modified(self, request) -> bool:
+        """True if the request's conditional headers already match this feed."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+            tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+class FeedCache:
+    """
+    Serialized ICS feeds per view token.
+
+    An entry is only reused while its key, the (data generation, view
+    version, timezone, window) it was rendered from, still matches, so a
+    stale feed is never served even between explicit invalidations.
+    Each token keeps up to VARIANTS feeds for different time windows,
+    dropping the least recently rendered first.
+    """
+
+    def __init__(self, variants: int = 8):
+        self.entries = {}   # token -> {variant: CachedFeed}
+        self.variants = variants
+        self.lock = threading.Lock()
+
+    def get(self, token: str, key: tuple, variant=None):
+        with self.lock:
+            entry = self.entries.get(token, {}).get(variant)
+        if entry is not None and entry.key == key:
+            return entry
+        return None
+
+    def put(self, token: str, key: tuple, body: bytes, variant=None) -> CachedFeed:
+        entry = CachedFeed(key, body)
+        with self.lock:
+            feeds = self.entries.setdefault(token, {})
+            previous = feeds.pop(variant, None)
+            if previous is not None and previous.etag == entry.etag:
+                entry.last_modified = previous.last_modified # Same bytes, same age
+            feeds[variant] = entry
+            while len(feeds) > self.variants:
+                feeds.pop(next(iter(feeds)))
+        return entry
+
+    def invalidate(self, token: str = None):
+        """Drop the cached feeds for TOKEN, or every feed if TOKEN is None."""
+        with self.lock:
+            if token is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(token, None)
@@ -1,25 +1,29 @@
-from fastapi import FastAPI, APIRouter, Depends, Query, Request
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request
 from fastapi_utils.tasks import repeat_every
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
+import asyncio
+import json
 import logging
 from icalendar import Calendar, Todo, Event
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 import uuid
 import os
 from zoneinfo import ZoneInfo
 
 from .db import Base, engine, SessionLocal
-from .sync import sync_repo
-from .sync_worker import run_sync_cycle, SYNC_INTERVAL, SYNC_RETRY
-from .parser import get_org_files, parse_org_file, import_tasks, refresh_db
-from .models import Task, serialize_task, serialize_event
-from .views import views_file, parse_views_file, get_tasks_for_view
-from .auth import verify_admin_login, require_admin, verify_session
+from .sync import REPO_BRANCH, compact_snapshots, list_snapshots, latest_commit, changed_files, in_repo
+from .sync_worker import sync_cycle, SyncPipeline, SYNC_INTERVAL, COMPACT_INTERVAL
+from .parser import get_org_files, parse_org_files, replace_tasks, imported_commit, stop_parser
+from .models import Task, TaskTag, Generation, ViewEntry, current_generation, serialize_task, serialize_event
+from .views import views_file, ViewRegistry, VIEWS_POLL_INTERVAL, views_version, view_meta, get_tasks_for_view, iter_tasks_for_view, materialize_views, resolve_window
+from .auth import verify_admin_login, require_admin, verify_session, verify_webhook
+from .feed_cache import FeedCache
+from .repeaters import occurrences, repeat_prefix, to_rrule
 
 TIMEZONE = os.getenv("TIMEZONE", "UTC")
 
@@ -40,6 +44,10 @@ uv_log = logging.getLogger("uvicorn")
 uv_log.handlers.clear()
 uv_log.addHandler(handler)
 
+feed_cache = FeedCache() # Serialized .ics feeds, see get_calendar_view
+registry = ViewRegistry(views_file) # Served views, see watch_views
+VIEWS_VERSION_HEADER = "X-Views-Version"
+
 # Security - mainly rate limiting
 limiter = Limiter(key_func=get_remote_address)
 
@@ -61,6 +69,13 @@ async def log_requests(request: Request, call_next):
     response = await call_next(request)
     return response
 
+@app.middleware("http")
+async def views_version_header(request: Request, call_next):
+    """Tag every response with the version of the served views, so clients caching view metadata notice edits."""
+    response = await call_next(request)
+    response.headers[VIEWS_VERSION_HEADER] = views_version(registry.views)
+    return response
+
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
     security_logger.exception(f"Unhandled error during {request.method} {request.url.path}")
@@ -73,30 +88,90 @@ async def generic_exception_handler(request: Request, exc: Exception):
 
 @app.on_event("startup")
 async def startup_event():
-    await run_sync_cycle()
-    logger.info("Initial sync complete")
-    
+    # Tasks are rebuilt from the org files below, so their tables are
+    # recreated to pick up any schema changes
+    Base.metadata.drop_all(bind=engine, tables=[ViewEntry.__table__, TaskTag.__table__, Task.__table__, Generation.__table__])
     Base.metadata.create_all(bind=engine)
     logger.info("Database initialized")
 
-    import_org_files(refresh = True) # Wipe database and re-read on every restart
-    logger.info("Database populated")
+    registry.reload(force=True) # An invalid views file is fatal at startup only
+    logger.info("Views parsed: " + str(len(registry.views)))
 
-    global VIEWS
-    VIEWS = parse_views_file(views_file)
-    logger.info("Views parsed: " + str(len(VIEWS)))
+    # With no imported commit yet, the first cycle re-reads every file
+    pipeline.start()
+    job = pipeline.submit("sync", reason="startup")
+    await asyncio.to_thread(job.wait)
+    logger.info(f"Initial sync complete ({job.status})")
     logger.info("Timezone: " + TIMEZONE)
 
 @app.on_event("startup")
-@repeat_every(seconds=SYNC_INTERVAL, wait_first=False, raise_exceptions=True)
+@repeat_every(seconds=SYNC_INTERVAL, wait_first=SYNC_INTERVAL, raise_exceptions=True) # The startup cycle covers the first interval
 async def periodic_task() -> None:
+    pipeline.submit("sync", reason="periodic") # Returns at once, the pipeline thread does the work
+
+@app.on_event("startup")
+@repeat_every(seconds=VIEWS_POLL_INTERVAL, wait_first=VIEWS_POLL_INTERVAL, raise_exceptions=True)
+async def watch_views() -> None:
+    """Pick up edits to the views file without waiting for a sync."""
+    if registry.modified():
+        # Reloading writes view_entries, so it is serialized with imports
+        pipeline.submit("views", reason="watcher")
+
+@app.on_event("startup")
+@repeat_every(seconds=COMPACT_INTERVAL, raise_exceptions=True)
+async def compact_task() -> None:
+    pipeline.submit("compact", reason="periodic")
+
+@app.on_event("shutdown")
+def shutdown_event():
+    pipeline.stop()
+    stop_parser()
+    logger.info("Parser stopped")
+
+def run_pipeline(job):
+    """Body of a pipeline job, run on the pipeline thread (see sync_worker)."""
+    if job.action == "compact":
+        result = compact_snapshots()
+        logger.info(f"Snapshots compacted: {result}")
+        return result
+    if job.action == "views":
+        return {"changed": sorted(reload_views())}
+    if job.action == "import":
+        return import_org_files(job.refresh)
+
     logger.info("Running sync cycle")
-    await run_sync_cycle()
-    VIEWS = parse_views_file(views_file)
-    logger.info("Views updated")
-    import_org_files()
-    logger.info("Database updated")
+    sync = sync_cycle()
+    result = update_org_files()
+    if result["files"]:
+        logger.info(f"Database updated: {len(result['files'])} file(s) re-imported")
+    else:
+        logger.info(f"Database unchanged at {result['commit']}")
+    return {"sync": sync} | result
+
+pipeline = SyncPipeline(run_pipeline)
+
+def materialize(session, generation, views=None, tokens=None):
+    """Fill view_entries for GENERATION from VIEWS, the served views by default."""
+    materialize_views(session, registry.views if views is None else views, generation, tokens)
+
+def rematerialize(views=None, tokens=None):
+    """Re-materialize view_entries of the current generation in its own transaction."""
+    session = SessionLocal()
+    try:
+        materialize(session, current_generation(session), views, tokens)
+        session.commit()
+    finally:
+        session.close()
 
+def reload_views():
+    """
+    Reload the views file, materializing the entries of changed views
+    before they are served, and drop only their cached feeds.
+    """
+    changed = registry.poll(before_swap=lambda views, changed: rematerialize(views, changed))
+    for token in changed:
+        feed_cache.invalidate(token)
+    return changed
     
 @app.get("/healthz")
 def healthz():
@@ -122,138 +197,309 @@ def verify_session_endpoint(request: Request):
 @app.post("/admin/sync")
 @limiter.limit("2/minute")
 def trigger_sync(request: Request, _ = Depends(require_admin)):
-    result = sync_repo()
-    return JSONResponse(content={"status": "sync_started", "result": result})
+    job = pipeline.submit("sync", reason="admin")
+    return JSONResponse(status_code=202, content={"status": "sync_started", "job": job.to_dict()})
 
 @app.post("/admin/import")
 @limiter.limit("2/minute")
 def import_org_files_route(request: Request, refresh: bool=Query(True, description="Wipe DB before import"), _ = Depends(require_admin)):
-    """Route wrapper that rate-limits and calls the real import function."""
-    return import_org_files(refresh)
+    """Route wrapper that rate-limits and queues the real import function."""
+    job = pipeline.submit("import", reason="admin", refresh=refresh)
+    return JSONResponse(status_code=202, content={"status": "import_started", "job": job.to_dict()})
+
+@app.post("/hooks/git")
+@limiter.limit("60/minute")
+def git_webhook(request: Request, body: bytes = Depends(verify_webhook)):
+    """
+    Push notifications from GitHub, Gitea or Forgejo. A burst of pushes is
+    debounced into a single sync job.
+    """
+    event = request.headers.get("x-github-event") or request.headers.get("x-gitea-event")
+    if event == "ping":
+        return {"status": "pong"}
+    try:
+        ref = json.loads(body).get("ref")
+    except (ValueError, AttributeError):
+        ref = None
+    if event not in (None, "push") or (ref and ref != f"refs/heads/{REPO_BRANCH}"):
+        return {"status": "ignored", "event": event, "ref": ref}
+    pending = pipeline.submit_debounced("sync", reason="webhook")
+    return JSONResponse(status_code=202, content={"status": "sync_scheduled", "pending_triggers": pending})
+
+@app.get("/admin/snapshots")
+def get_snapshots(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500, description="Snapshots per page"),
+    before: int | None = Query(None, description="Only snapshots older than this id"),
+    _ = Depends(require_admin),
+):
+    """Sync history, newest first, one page at a time."""
+    snapshots = list_snapshots(limit, before)
+    next_before = snapshots[-1]["id"] if len(snapshots) == limit else None
+    return {"snapshots": snapshots, "next_before": next_before}
+
+@app.get("/admin/jobs")
+def list_jobs(request: Request, _ = Depends(require_admin)):
+    """Recent pipeline jobs, newest first."""
+    return [job.to_dict() for job in pipeline.recent()]
+
+@app.get("/admin/jobs/{job_id}")
+def job_status(request: Request, job_id: int, _ = Depends(require_admin)):
+    job = pipeline.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
 
 def import_org_files(refresh: bool = Query(True, description="Wipe DB before import")):
     """Import tasks from all org files into database"""
-    files = get_org_files()
-    all_tasks = []
+    commit = latest_commit()
+    parsed, errors = parse_org_files(get_org_files())
     if refresh:
-        refresh_db()
-    for f in files:
-        parsed = parse_org_file(f)
-        import_tasks(parsed)
-        all_tasks.extend(parsed)
+        # Files that failed are recorded with the commit, and retried on their own next cycle
+        imported = replace_tasks(parsed, commit_hash=commit, failed_files=errors, before_commit=materialize)
+    else:
+        # Append to the served rows, still as a new generation swapped in by one commit
+        imported = replace_tasks(parsed, files=[], commit_hash=imported_commit()[0], failed_files=errors, before_commit=materialize)
+    feed_cache.invalidate()
     return {
-        "imported": len(all_tasks),
+        "imported": imported,
         "refresh": refresh,
-        "tasks": all_tasks
+        "errors": errors,
     }
 
+def update_org_files():
+    """
+    Re-import only the org files that changed between the last imported
+    commit and the latest synced one, plus those that failed to parse last
+    time. Does nothing if HEAD has not moved and nothing is left to retry,
+    and publishes nothing if the retried files fail again.
+    """
+    commit = latest_commit()
+    last_imported_commit, failed = imported_commit()
+    if commit is None or (commit == last_imported_commit and not failed):
+        return {"imported": 0, "commit": commit, "files": [], "errors": {}}
+
+    changed = None
+    if last_imported_commit is not None:
+        changed = changed_files(last_imported_commit, commit) if commit != last_imported_commit else set()
+    if changed is None:
+        # No usable history to diff against, fall back to a full import
+        result = import_org_files(refresh=True)
+        return {"imported": result["imported"], "commit": commit, "files": get_org_files(), "errors": result["errors"]}
+
+    # Files outside the repo are invisible to git, so re-read them whenever HEAD moves
+    moved = commit != last_imported_commit
+    files = [
+        f for f in get_org_files()
+        if os.path.normpath(f) in changed or f in failed or (moved and not in_repo(f))
+    ]
+    removed = [f for f in files if not os.path.exists(f)]
+    parsed, errors = parse_org_files([f for f in files if f not in removed])
+    if not moved and not parsed and not removed and sorted(errors) == sorted(failed):
+        # Still failing, publishing an identical generation would only churn the feeds
+        return {"imported": 0, "commit": commit, "files": files, "errors": errors}
+
+    # Files that failed to parse keep their previous rows, and are retried next cycle
+    imported = replace_tasks(
+        parsed,
+        files=removed + [f for f, _ in parsed],
+        commit_hash=commit,
+        failed_files=errors,
+        before_commit=materialize,
+    )
+    feed_cache.invalidate()
+    return {"imported": imported, "commit": commit, "files": files, "errors": errors}
+
 @app.get("/admin/calendar.ics")
 def get_calendar(request: Request, _ = Depends(require_admin)):
     session = SessionLocal()
-    try:
-        cal = Calendar()
-        cal.add("prodid", "-//Org Parser//EN")
-        cal.add("version", "2.0")
-
-        for t in session.query(Task).all():
-            if t.kind == "event":
-                cal.add_component(
-                    make_event(t.title, t.ts_start_date, t.ts_start_time,
-                               t.ts_end_date, t.ts_end_time)
-                    )
-            elif t.kind == "task":
-                cal.add_component(
-                    make_todo(t.title, t.deadline_start_date, t.deadline_start_time, t.todo)
-                )
-        return Response(cal.to_ical(), media_type="text/calendar")
-    finally:
-        session.close()
+    return StreamingResponse(
+        stream_closing(session, ical_stream(all_components(session))),
+        media_type="text/calendar",
+    )
+
+def all_components(session):
+    """Yield a VEVENT/VTODO for every row of the current generation."""
+    generation = current_generation(session)
+    query = session.query(Task).filter(Task.generation == generation).yield_per(500)
+    for t in query:
+        if t.kind == "event":
+            yield make_event(t.title, t.ts_start_date, t.ts_start_time,
+                             t.ts_end_date, t.ts_end_time,
+                             uid=t.uid, dtstamp=make_dtstamp(t.created_at),
+                             rrule=event_rrule(t))
+        elif t.kind == "task":
+            yield make_todo(t.title, t.deadline_start_date, t.deadline_start_time, t.todo,
+                            uid=t.uid, dtstamp=make_dtstamp(t.created_at),
+                            rrule=to_rrule(t, "deadline"))
 
 @app.get("/admin/views")
 def list_views(request: Request, _ = Depends(require_admin)):
-    return VIEWS
+    return dict(registry.views)
+
+@app.get("/views/meta")
+def views_meta(request: Request, _ = Depends(require_admin)):
+    """
+    Metadata (name, token, detail, default window) of every view, keyed by
+    token, so clients can fill a cache in one request. The ETag is the
+    views version; send it back in If-None-Match to revalidate.
+    """
+    views = registry.views
+    etag = f'"{views_version(views)}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse({token: view_meta(v) for token, v in views.items()}, headers={"ETag": etag})
 
 @app.get("/view/{token}")
 def view_details(request: Request, token: str):
-    return VIEWS[token]
+    view = registry.views.get(token)
+    if view is None:
+        raise HTTPException(status_code=404, detail="Unknown view")
+    etag = f'"{view.version[:32]}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(view, headers={"ETag": etag})
     
+def feed_window(
+    token: str,
+    start: date | None = Query(None, description="First day to include"),
+    end: date | None = Query(None, description="Last day to include"),
+    past_days: int | None = Query(None, ge=0, description="Days before today to include"),
+    future_days: int | None = Query(None, ge=0, description="Days after today to include"),
+):
+    """Dependency resolving a feed's time window, falling back to the view's defaults."""
+    return resolve_window(registry.views.get(token), start, end, past_days, future_days)
+
 @app.get("/calendar/{token}/tasks.json")
 @limiter.limit("10/minute")
-def get_view_tasks(request: Request, token: str):
+def get_view_tasks(request: Request, token: str, window = Depends(feed_window)):
     """Get a JSON representation of all tasks for a 'view'."""
     session = SessionLocal()
     serialized_tasks = []
     try:
-        task_entries = get_tasks_for_view(session, VIEWS, token)
+        task_entries = get_tasks_for_view(session, registry.views, token, window)
         for entry in task_entries:
             task = entry["task"]
             detail = entry["detail"]
             category = entry["category"]
-            serialized_tasks.append(serialize_task(task, category, detail))
+            for fields in occurrences(task, window, "scheduled"): # The timestamp serialize_task exposes
+                serialized_tasks.append(serialize_task(task, category, detail) | fields)
         return serialized_tasks
     finally:
         session.close()
 
 @app.get("/calendar/{token}/events.json")
 @limiter.limit("10/minute")
-def get_view_events(request: Request, token: str):
+def get_view_events(request: Request, token: str, window = Depends(feed_window)):
     """Get a JSON representation of all events for a 'view'."""
     session = SessionLocal()
     serialized_events = []
     try:
-        event_entries = get_tasks_for_view(session, VIEWS, token)
+        event_entries = get_tasks_for_view(session, registry.views, token, window)
         for entry in event_entries:
             event = entry["task"]
             detail = entry["detail"]
             category = entry["category"]
-            serialized_events.append(serialize_event(event, category, detail))
+            for fields in occurrences(event, window, "ts"): # The timestamp serialize_event exposes
+                serialized_events.append(serialize_event(event, category, detail) | fields)
         return serialized_events
     finally:
         session.close()
 
 @app.get("/calendar/{token}.ics")
 @limiter.limit("30/minute")
-def get_calendar_view(request: Request, token: str):
+def get_calendar_view(request: Request, token: str, window = Depends(feed_window)):
     """Create a multi-calendar .ics feed for a give view TOKEN"""
+    views = registry.views # Render from the views the cache key was built from
+    view = views.get(token)
+    if view is None:
+        # Not cached, the feed cache would otherwise grow with every token tried
+        raise HTTPException(status_code=404, detail="Unknown view")
     session = SessionLocal()
     try:
-        task_entries = get_tasks_for_view(session, VIEWS, token)
-        cal = Calendar()
-        cal.add("prodid", "-//Org Parser//EN")
-        cal.add("version", "2.0")
-        
-        for entry in task_entries:
-            task = entry["task"]
-            detail = entry["detail"]
-            category = entry["category"]
-            color = entry["color"]
-            title = "Busy" if detail == "time-only" else task.title
-            
-            if task.kind == "event":
-                event = make_event(
-                    title,
-                    task.ts_start_date,
-                    task.ts_start_time,
-                    task.ts_end_date,
-                    task.ts_end_time)
-                if category:
-                    event.add("categories", [category])
-                if color:
-                    event.add("color", color)
-                cal.add_component(event)
-            elif task.kind == "task":
-                todo = make_todo(
-                    title,
-                    task.deadline_start_date,
-                    task.deadline_start_time,
-                    task.todo)
-                if category:
-                    todo.add("categories", [category])
-                if color:
-                    todo.add("color", color)
-                cal.add_component(todo)
-
-        return Response(content=cal.to_ical(), media_type="text/calendar")
+        key = (current_generation(session), view.version, TIMEZONE, window)
+        feed = feed_cache.get(token, key, window)
+    except Exception:
+        session.close()
+        raise
+
+    if feed is None:
+        # Stream the first render, it is served from the cache afterwards
+        return StreamingResponse(
+            stream_and_cache(session, views, token, key, window), media_type="text/calendar"
+        )
+    session.close()
+
+    if feed.not_modified(request):
+        return Response(status_code=304, headers=feed.headers)
+    return Response(content=feed.body, media_type="text/calendar", headers=feed.headers)
+
+def stream_and_cache(session, views, token: str, key: tuple, window=(None, None)):
+    """Stream the .ics feed for TOKEN, storing it in the feed cache once complete."""
+    chunks = []
+    for chunk in stream_closing(session, ical_stream(view_components(session, views, token, window))):
+        chunks.append(chunk)
+        yield chunk
+    feed_cache.put(token, key, b"".join(chunks), window)
+
+def view_components(session, views, token: str, window=(None, None)):
+    """Yield the VEVENT/VTODO components of view TOKEN."""
+    for entry in iter_tasks_for_view(session, views, token, window):
+        task = entry["task"]
+        detail = entry["detail"]
+        category = entry["category"]
+        color = entry["color"]
+        title = "Busy" if detail == "time-only" else task.title
+
+        if task.kind == "event":
+            event = make_event(
+                title,
+                task.ts_start_date,
+                task.ts_start_time,
+                task.ts_end_date,
+                task.ts_end_time,
+                uid=task.uid,
+                dtstamp=make_dtstamp(task.created_at),
+                rrule=event_rrule(task))
+            if category:
+                event.add("categories", [category])
+            if color:
+                event.add("color", color)
+            yield event
+        elif task.kind == "task":
+            todo = make_todo(
+                title,
+                task.deadline_start_date,
+                task.deadline_start_time,
+                task.todo,
+                uid=task.uid,
+                dtstamp=make_dtstamp(task.created_at),
+                rrule=to_rrule(task, "deadline"))
+            if category:
+                todo.add("categories", [category])
+            if color:
+                todo.add("color", color)
+            yield todo
+
+def ical_stream(components):
+    """
+    Serialize a VCALENDAR one component at a time. Each component is folded
+    and escaped by icalendar itself, so the concatenation is byte-for-byte
+    what Calendar.to_ical() would produce for the same components.
+    """
+    cal = Calendar()
+    cal.add("prodid", "-//Org Parser//EN")
+    cal.add("version", "2.0")
+    footer = b"END:VCALENDAR\r\n"
+    yield cal.to_ical()[:-len(footer)]
+    for component in components:
+        yield component.to_ical()
+    yield footer
+
+def stream_closing(session, chunks):
+    """Pass CHUNKS through, closing SESSION once they are exhausted or abandoned."""
+    try:
+        yield from chunks
     finally:
         session.close()
 
@@ -269,10 +515,20 @@ def make_dt(date_str, time_str=None):
         return dt.replace(tzinfo=tz)
     return datetime.strptime(date_str, "%Y-%m-%d").date()
 
-def make_event(title, start_date, start_time, end_date=None, end_time=None):
+def make_dtstamp(created_at):
+    """DTSTAMP from the import time of a row, stored as naive UTC."""
+    if created_at is None:
+        return datetime.now(timezone.utc)
+    return created_at.replace(tzinfo=timezone.utc, microsecond=0)
+
+def event_rrule(task):
+    """RRULE for an event row, from the repeater on its timestamp."""
+    return to_rrule(task, "ts") if repeat_prefix(task) == "ts" else None
+
+def make_event(title, start_date, start_time, end_date=None, end_time=None, uid=None, dtstamp=None, rrule=None):
     event=Event()    
-    event.add("uid", str(uuid.uuid4()))
-    event.add("dtstamp", datetime.now(timezone.utc))
+    event.add("uid", uid or str(uuid.uuid4()))
+    event.add("dtstamp", dtstamp or datetime.now(timezone.utc))
     event.add("summary", title)
     
     dtstart = make_dt(start_date, start_time)
@@ -281,13 +537,16 @@ def make_event(title, start_date, start_time, end_date=None, end_time=None):
     dtend = make_dt(end_date, end_time)
     if dtend:
         event.add("dtend", dtend)
+
+    if rrule and dtstart:
+        event.add("rrule", rrule)
         
     return event
 
-def make_todo(title, due_date=None, due_time=None, todo_value=None):
+def make_todo(title, due_date=None, due_time=None, todo_value=None, uid=None, dtstamp=None, rrule=None):
     todo = Todo()
-    todo.add("uid", str(uuid.uuid4()))
-    todo.add("dtstamp", datetime.now(timezone.utc))
+    todo.add("uid", uid or str(uuid.uuid4()))
+    todo.add("dtstamp", dtstamp or datetime.now(timezone.utc))
     todo.add("summary", title)
     if todo_value:
         todo.add("status", todo_value)
@@ -295,6 +554,10 @@ def make_todo(title, due_date=None, due_time=None, todo_value=None):
     due = make_dt(due_date, due_time)
     if due:
         todo.add("due", due)
+        if rrule:
+            # A recurring VTODO needs DTSTART to anchor the series
+            todo.add("dtstart", due)
+            todo.add("rrule", rrule)
     return todo
 
 
@@ -302,7 +565,6 @@ def make_todo(title, due_date=None, due_time=None, todo_value=None):
 # Additional TODO fields to add (based on fields defined in github.com/ical-org/ical.net/wiki
 # PRIORITY, STATUS (todo)
 # Custom field for scheduled?
-# Handle repeaters? Would need RRULE for timestamp repeater, and custom RRULE for scheduled and deadline repeaters.
         
 # Debugging functions.
 # Endpoints are deactivated - useful if something breaks in future.        
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Time, Boolean, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Date, Time, Boolean, DateTime, Enum, ForeignKey, Index, func, select
 from datetime import datetime
 from .db import Base
 
@@ -15,6 +15,18 @@ class Snapshot(Base):
     log = Column(String, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+class Generation(Base):
+    """
+    One complete import of the tasks table. Imports write their rows under
+    a new generation and readers only see the highest committed one, so the
+    switch from the old dataset to the new one is a single commit.
+    """
+    __tablename__ = "generations"
+    id = Column(Integer, primary_key=True, index=True)
+    commit_hash = Column(String, nullable=True)   # Commit imported, if any
+    failed_files = Column(String, nullable=True)  # JSON list of files that failed to parse at that commit
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -72,8 +84,73 @@ class Task(Base):
     file = Column(String, nullable=True)        # /data/work.org
     parent = Column(String, nullable=True)      # "Headline"
     kind = Column(String, default="task")       # "task" or "event"    
-    created_at = Column(DateTime, default=datetime.utcnow)
+    uid = Column(String, nullable=True)         # Stable iCalendar UID
+
+    # Normalized times, computed at import in TIMEZONE and stored as naive UTC
+    start_at    = Column(DateTime, nullable=True)   # Event timestamp, else scheduled, else deadline
+    end_at      = Column(DateTime, nullable=True)
+    scheduled_at = Column(DateTime, nullable=True)
+    deadline_at  = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)  # Import time, used as DTSTAMP
+    generation = Column(Integer, nullable=False, default=0, index=True)
+
+    __table_args__ = (
+        Index("ix_tasks_generation_uid", "generation", "uid"),
+        Index("ix_tasks_kind_start_at", "kind", "start_at"),
+        Index("ix_tasks_file", "file"),
+        Index("ix_tasks_todo", "todo"),
+        Index("ix_tasks_scheduled_at", "scheduled_at"),
+        Index("ix_tasks_deadline_at", "deadline_at"),
+    )
+
+class TaskTag(Base):
+    """One row per (task, tag), so tag filters are index lookups."""
+    __tablename__ = "task_tags"
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_task_tags_tag", "tag", "task_id"),
+    )
 
+class ViewEntry(Base):
+    """
+    Which tasks each view serves, with the calendar, detail and color they
+    are served under. Materialized for every generation at import time and
+    for changed views on reload, so feeds read pre-joined rows instead of
+    evaluating filters (see views.materialize_views).
+    """
+    __tablename__ = "view_entries"
+    generation = Column(Integer, primary_key=True)
+    token = Column(String, primary_key=True)
+    position = Column(Integer, primary_key=True)    # First matching rule, feeds are ordered by it
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    calendar = Column(String, nullable=True)
+    detail = Column(String, nullable=True)
+    color = Column(String, nullable=True)
+
+
+
+def current_generation(session) -> int:
+    """Return the id of the generation readers should currently see."""
+    return session.query(func.max(Generation.id)).scalar() or 0
+
+def latest_generation():
+    """
+    The current generation id as a scalar subquery. Embedding it lets a
+    single statement read the pointer and the rows from the same snapshot.
+    """
+    return select(func.coalesce(func.max(Generation.id), 0)).scalar_subquery()
+
+
+def serialize_snapshot(snapshot):
+    return {
+        "id": snapshot.id,
+        "commit_hash": snapshot.commit_hash,
+        "status": snapshot.status,
+        "log": snapshot.log,
+        "timestamp": snapshot.timestamp.isoformat() if snapshot.timestamp else None,
+    }
 
 def serialize_task(task, category, detail="full"):
     return {
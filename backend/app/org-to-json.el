@@ -1,6 +1,7 @@
 (require 'org)
 (require 'org-element)
 (require 'json)
+(require 'subr-x)
 
 (defun cal-server/org-parse-timestamp (ts prefix)
   "Return an alist of structured timestamp info from org-element timestamp TS."
@@ -98,23 +99,32 @@ directly belong to the headline (not child headlines)."
 		       (org-get-tags)))
                (parent    (org-element-property :raw-value
 						(org-element-property :parent hl)))
+               ;; Stable identity: org ID if present, else the outline path
+               (id        (org-element-property :ID hl))
+               (path      (mapcar (lambda (h) (org-element-property :raw-value h))
+                                  (reverse (org-element-lineage hl '(headline) t))))
                (kind      (if (or todo scheduled deadline) "task" "event")))
           (when (or todo scheduled deadline timestamps)
             (if timestamps
 		;; multiple timestamps = multiple entries
-		(dolist (ts timestamps)
-                  (push
-                   (append
-                    `((title . ,title)
-                      (todo . ,todo)
-                      (tags . ,tags)
-                      (file . ,file)
-                      (parent . ,parent)
-                      (kind . ,kind))
-                    (cal-server/org-parse-timestamp scheduled "scheduled")
-                    (cal-server/org-parse-timestamp deadline "deadline")
-                    (cal-server/org-parse-timestamp ts "timestamp"))
-                   results))
+		(let ((index 0))
+		  (dolist (ts timestamps)
+                    (push
+                     (append
+                      `((title . ,title)
+                        (todo . ,todo)
+                        (tags . ,tags)
+                        (file . ,file)
+                        (parent . ,parent)
+                        (id . ,id)
+                        (path . ,path)
+                        (index . ,index)
+                        (kind . ,kind))
+                      (cal-server/org-parse-timestamp scheduled "scheduled")
+                      (cal-server/org-parse-timestamp deadline "deadline")
+                      (cal-server/org-parse-timestamp ts "timestamp"))
+                     results)
+                    (setq index (1+ index))))
               ;; no inline timestamps → still push one entry
               (push
                (append
@@ -123,8 +133,118 @@ directly belong to the headline (not child headlines)."
                   (tags . ,tags)
                   (file . ,file)
                   (parent . ,parent)
+                  (id . ,id)
+                  (path . ,path)
+                  (index . 0)
                   (kind . ,kind))
 		(cal-server/org-parse-timestamp scheduled "scheduled")
 		(cal-server/org-parse-timestamp deadline "deadline"))
                results))))))
     (princ (json-encode (nreverse results)))))
+
+
+;; Streaming mode: the same entries as `cal-server/org-extract-tasks',
+;; without parsing the whole buffer down to objects first.
+
+(defun cal-server/org-section-timestamps ()
+  "Timestamps in the section of the headline at point.
+Only the text between the planning line / property drawer and the next
+headline is parsed, so timestamps of child headlines are never visited.
+Sections without anything that looks like a timestamp are not parsed."
+  (save-excursion
+    (org-end-of-meta-data)
+    (let ((beg (point))
+          (end (save-excursion (if (outline-next-heading) (point) (point-max)))))
+      (when (and (< beg end)
+                 (save-excursion (re-search-forward "[[<][0-9%]" end t)))
+        (save-restriction
+          (narrow-to-region beg end)
+          (org-element-map (org-element-parse-buffer) 'timestamp #'identity))))))
+
+(defun cal-server/org-extract-tasks-stream ()
+  "Print the tasks of the current Org buffer as JSON, one object per line.
+Headlines are read one at a time with `org-element-at-point', in document
+order, and each entry is printed as soon as its headline has been read.
+Inherited tags come from a stack of ancestors instead of `org-get-tags'.
+Returns the number of entries printed."
+  (let ((file (buffer-file-name))
+        (count 0)
+        ancestors) ; (level title tags) of the headlines above point, nearest first
+    (org-with-wide-buffer
+     (goto-char (point-min))
+     (while (re-search-forward org-outline-regexp-bol nil t)
+       (goto-char (match-beginning 0))
+       (let ((hl (org-element-at-point)))
+         (when (eq (org-element-type hl) 'headline)
+           (let* ((level     (org-element-property :level hl))
+                  (todo      (org-element-property :todo-keyword hl))
+                  (title     (org-element-property :raw-value hl))
+                  (scheduled (org-element-property :scheduled hl))
+                  (deadline  (org-element-property :deadline hl))
+                  (id        (org-element-property :ID hl))
+                  (local     (org-element-property :tags hl)))
+             (while (and ancestors (>= (car (car ancestors)) level))
+               (pop ancestors))
+             (let* ((parent     (nth 1 (car ancestors)))
+                    (path       (reverse (cons title (mapcar #'cadr ancestors))))
+                    (inherited  (append org-file-tags
+                                        (apply #'append (reverse (mapcar #'caddr ancestors)))))
+                    ;; As `org-get-tags': the last occurrence of a tag wins
+                    (tags       (nreverse (delete-dups
+                                           (nreverse (append (org-remove-uninheritable-tags inherited)
+                                                             local)))))
+                    (timestamps (cal-server/org-section-timestamps))
+                    (kind       (if (or todo scheduled deadline) "task" "event"))
+                    (index      0))
+               (push (list level title local) ancestors)
+               (when (or todo scheduled deadline timestamps)
+                 (dolist (ts (or timestamps '(nil)))
+                   (princ (json-encode
+                           (append
+                            `((title . ,title)
+                              (todo . ,todo)
+                              (tags . ,tags)
+                              (file . ,file)
+                              (parent . ,parent)
+                              (id . ,id)
+                              (path . ,path)
+                              (index . ,index)
+                              (kind . ,kind))
+                            (cal-server/org-parse-timestamp scheduled "scheduled")
+                            (cal-server/org-parse-timestamp deadline "deadline")
+                            (cal-server/org-parse-timestamp ts "timestamp"))))
+                   (terpri)
+                   (setq index (1+ index)
+                         count (1+ count))))))))
+       (forward-line 1)))
+    count))
+
+(defun cal-server/org-extract-file (file &optional extract)
+  "Visit FILE, run EXTRACT there, then kill the buffer again.
+EXTRACT defaults to `cal-server/org-extract-tasks'; its value is returned.
+Killing the buffer keeps a long-lived Emacs from serving stale contents
+the next time FILE is requested."
+  (let ((buf (find-file-noselect file t)))
+    (unwind-protect
+        (with-current-buffer buf
+          (funcall (or extract #'cal-server/org-extract-tasks)))
+      (kill-buffer buf))))
+
+(defun cal-server/org-extract-stream-server ()
+  "Read org file paths from stdin and answer each with NDJSON.
+Runs until stdin is closed. Each task is printed on its own line as soon
+as it is extracted, and the answer for a file ends with a line
+{\"end\": COUNT}. A file that fails is ended with {\"error\": MESSAGE}
+instead, so the caller stays in sync, and the tasks printed before it are
+to be discarded. Reading the next path flushes stdout, so each answer
+reaches the caller before Emacs blocks on input again."
+  (let (line)
+    (while (setq line (ignore-errors (read-from-minibuffer "")))
+      (let ((file (string-trim line)))
+        (unless (string-empty-p file)
+          (princ (json-encode
+                  (condition-case err
+                      `((end . ,(cal-server/org-extract-file
+                                 file #'cal-server/org-extract-tasks-stream)))
+                    (error `((error . ,(error-message-string err)))))))
+          (terpri))))))
@@ -0,0 +1,351 @@
+"""
+In-process org parser, producing the same task dicts as
+`cal-server/org-extract-tasks` in org-to-json.el.
+
+It follows the parts of org-element's syntax the extractor relies on:
+headlines with TODO keywords (including #+TODO / #+SEQ_TODO / #+TYP_TODO),
+priorities, COMMENT and tags (inherited, with #+FILETAGS), the planning
+line, the :ID: property, and the timestamps directly in a headline's
+section. Text that org-element does not parse into objects (blocks other
+than quote/center/verse/special ones, comments, keywords, fixed-width
+lines, clocks, links and verbatim/code markup) is skipped.
+
+Run `python -m app.org_parser compare FILE...` to check it against Emacs,
+or `python -m app.org_parser bench FILE...` to compare throughput.
+"""
+import os
+import re
+from functools import lru_cache
+
+DEFAULT_TODO_KEYWORDS = ["TODO", "DONE"]
+
+HEADLINE_RE = re.compile(r"^(\*+) (.*)$")
+TAGS_RE = re.compile(r"(?:^|[ \t]+)(:[\w@#%:]+:)[ \t]*$")
+PRIORITY_RE = re.compile(r"\[#.\][ \t]*")
+COMMENT_RE = re.compile(r"COMMENT(?: |$)")
+TODO_SETTING_RE = re.compile(r"^[ \t]*#\+(?:TODO|SEQ_TODO|TYP_TODO):(.*)$", re.IGNORECASE)
+FILETAGS_RE = re.compile(r"^[ \t]*#\+FILETAGS:(.*)$", re.IGNORECASE)
+
+PLANNING_LINE_RE = re.compile(r"^[ \t]*(?:CLOSED|DEADLINE|SCHEDULED):")
+PLANNING_KEYWORD_RE = re.compile(r"\b(CLOSED|DEADLINE|SCHEDULED):[ \t]*")
+PROPERTIES_RE = re.compile(r"^[ \t]*:PROPERTIES:[ \t]*$", re.IGNORECASE)
+PROPERTY_RE = re.compile(r"^[ \t]*:([\w-]+?)(\+)?:(?:[ \t]+(.*?))?[ \t]*$")
+END_RE = re.compile(r"^[ \t]*:END:[ \t]*$", re.IGNORECASE)
+
+# Lines whose contents org-element does not parse into objects
+BLOCK_BEGIN_RE = re.compile(r"^[ \t]*#\+BEGIN_(\S+)", re.IGNORECASE)
+VERBATIM_BLOCKS = {"SRC", "EXAMPLE", "EXPORT", "COMMENT"}
+SKIPPED_LINE_RE = re.compile(
+    r"^[ \t]*(?:#(?: |$)|#\+\S*:|:(?: |$)|CLOCK:)"  # comment, keyword, fixed width, clock
+    r"|^%%\("                                      # diary sexp
+)
+
+# Objects that may contain a "[" or "<" that is not a timestamp
+LINK_RE = re.compile(r"\[\[(?:[^\]\[\\]|\\.)+\](?:\[.+?\])?\]")
+VERBATIM_RE = re.compile(r"""(?:(?<=^)|(?<=[\s\-('"{]))([=~])(?!\s)(.+?)(?<!\s)\1(?=[\s\-.,:!?;'")}\\\[]|$)""")
+
+TIMESTAMP_RE = re.compile(
+    r"[\[<]\d{4}-\d{2}-\d{2}(?: [^\n]*?)?[\]>]"
+    r"|<\d+-\d+-\d+[^>\n]+?\+\d+[dwmy]>"
+    r"|<%%\([^>\n]+\)>"
+)
+# Group 1 is the first timestamp without its closing bracket, group 3 the range end
+RAW_TIMESTAMP_RE = re.compile(
+    r"([<\[](%%)?.*?)[\]>](?:--([\[<]\d{4}-\d{2}-\d{2}(?: .*?)?[\]>]))?"
+)
+TIME_STRING_RE = re.compile(
+    r"((\d{4})-(\d{2})-(\d{2})( +[^\]+0-9>\r\n -]+)?( +(\d{1,2}):(\d{2}))?)"
+)
+TIME_RANGE_RE = re.compile(r"[012]?[0-9]:[0-5][0-9](-([012]?[0-9]):([0-5][0-9]))")
+REPEATER_RE = re.compile(r"([.+]?\+)(\d+)([hdwmy])")
+WARNING_RE = re.compile(r"(-)?-(\d+)([hdwmy])")
+
+REPEATER_TYPES = {"++": "catch-up", ".+": "restart"}
+UNITS = {"h": "hour", "d": "day", "w": "week", "m": "month", "y": "year"}
+
+class OrgSyntaxError(ValueError):
+    """Raised for input the Emacs extractor also fails on."""
+
+def parse_time_string(s: str):
+    """(year, month, day, hour, minute) as org-parse-time-string with NODEFAULT."""
+    m = TIME_STRING_RE.search(s)
+    if not m:
+        raise OrgSyntaxError(f"Not an Org time string: {s}")
+    hour = int(m.group(7)) if m.group(7) else None
+    minute = int(m.group(8)) if m.group(8) else None
+    return int(m.group(2)), int(m.group(3)), int(m.group(4)), hour, minute
+
+@lru_cache(maxsize=4096) # Callers merge the result into a new dict, never mutate it
+def parse_timestamp(raw: str, prefix: str) -> dict:
+    """
+    Fields of one timestamp, named after PREFIX, as cal-server/org-parse-timestamp
+    lays out org-element's timestamp properties.
+    """
+    m = RAW_TIMESTAMP_RE.match(raw)
+    if m.group(2):
+        # Diary timestamps have no date, which the Emacs extractor cannot format
+        raise OrgSyntaxError(f"Diary timestamps are not supported: {raw}")
+    raw_value = m.group(0)
+    date_start, date_end = m.group(1), m.group(3)
+
+    time_range = TIME_RANGE_RE.search(date_start)
+    year_s, month_s, day_s, hour_s, minute_s = parse_time_string(date_start)
+    end = parse_time_string(date_end) if date_end else (None,) * 5
+    year_e = end[0] or year_s
+    month_e = end[1] or month_s
+    day_e = end[2] or day_s
+    hour_e = next((v for v in (end[3], time_range and int(time_range.group(2)), hour_s) if v is not None), None)
+    minute_e = next((v for v in (end[4], time_range and int(time_range.group(3)), minute_s) if v is not None), None)
+
+    fields = {
+        "start_date": f"{year_s:04d}-{month_s:02d}-{day_s:02d}",
+        "start_time": f"{hour_s:02d}:{minute_s or 0:02d}" if hour_s is not None else None,
+        "end_date": f"{year_e:04d}-{month_e:02d}-{day_e:02d}",
+        "end_time": f"{hour_e:02d}:{minute_e or 0:02d}" if hour_e is not None else None,
+        "all_day": True if hour_s is None and hour_e is None else None,
+        "repeater_type": None,
+        "repeater_value": None,
+        "repeater_unit": None,
+        "warning_type": None,
+        "warning_value": None,
+        "warning_unit": None,
+    }
+    repeater = REPEATER_RE.search(raw_value)
+    if repeater:
+        fields["repeater_type"] = REPEATER_TYPES.get(repeater.group(1), "cumulate")
+        fields["repeater_value"] = int(repeater.group(2))
+        fields["repeater_unit"] = UNITS[repeater.group(3)]
+    warning = WARNING_RE.search(raw_value)
+    if warning:
+        fields["warning_type"] = "first" if warning.group(1) else "all"
+        fields["warning_value"] = int(warning.group(2))
+        fields["warning_unit"] = UNITS[warning.group(3)]
+    return {f"{prefix}_{key}": value for key, value in fields.items()}
+
+def find_timestamps(line: str) -> list[str]:
+    """Raw timestamps in a line of text, skipping links and verbatim/code markup."""
+    if "<" not in line and "[" not in line:
+        return []
+    masked = LINK_RE.sub(lambda m: " " * len(m.group(0)), line)
+    masked = VERBATIM_RE.sub(lambda m: " " * len(m.group(0)), masked)
+    found = []
+    pos = 0
+    while (m := TIMESTAMP_RE.search(masked, pos)):
+        raw = RAW_TIMESTAMP_RE.match(line, m.start())
+        found.append(raw.group(0))
+        pos = max(m.end(), raw.end()) # Past the end of a range
+    return found
+
+def todo_keywords(lines: list[str]) -> list[str]:
+    keywords = []
+    for line in lines:
+        m = TODO_SETTING_RE.match(line)
+        if m:
+            for word in m.group(1).split():
+                if word != "|":
+                    keywords.append(re.sub(r"\(.*\)$", "", word))
+    return keywords or DEFAULT_TODO_KEYWORDS
+
+def file_tags(lines: list[str]) -> list[str]:
+    tags = []
+    for line in lines:
+        m = FILETAGS_RE.match(line)
+        if m:
+            for word in m.group(1).split():
+                tags.extend(t for t in word.split(":") if t)
+    return tags
+
+def merge_tags(tags: list[str]) -> list[str]:
+    """Drop duplicates, keeping the last occurrence, as org-get-tags does."""
+    seen = set()
+    merged = []
+    for tag in reversed(tags):
+        if tag not in seen:
+            seen.add(tag)
+            merged.append(tag)
+    return merged[::-1]
+
+def parse_headline(text: str, todo_re):
+    """(todo, title, local tags) of a headline, given the text after its stars."""
+    pos = len(text) - len(text.lstrip(" \t"))
+    todo = None
+    m = todo_re.match(text, pos)
+    if m:
+        todo = m.group(1)
+        pos = m.end()
+        pos += len(text[pos:]) - len(text[pos:].lstrip(" \t"))
+    m = PRIORITY_RE.match(text, pos)
+    priority = m is not None
+    if priority:
+        pos = m.end()
+    m = COMMENT_RE.match(text, pos)
+    commented = m is not None
+    if commented:
+        pos = m.end()
+    title_start = pos
+    tags = []
+    title_end = len(text)
+    # Back up over the blanks after the keyword, so a headline holding only
+    # tags, like "* :tag:" or "* TODO :tag:", still has them separated
+    m = TAGS_RE.search(text, len(text[:pos].rstrip(" \t")))
+    if m:
+        tags = [t for t in m.group(1).split(":") if t]
+        title_end = m.start()
+    title = text[title_start:title_end].strip() if title_end > title_start else ""
+    return todo, title, tags
+
+def section_lines(lines: list[str]):
+    """Lines of a section whose contents org-element parses into objects."""
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        block = BLOCK_BEGIN_RE.match(line)
+        if block:
+            name = block.group(1).upper()
+            end_re = re.compile(rf"^[ \t]*#\+END_{re.escape(name)}[ \t]*$", re.IGNORECASE)
+            end = next((j for j in range(i + 1, len(lines)) if end_re.match(lines[j])), None)
+            if end is not None:
+                if name not in VERBATIM_BLOCKS:
+                    yield from section_lines(lines[i + 1:end])
+                i = end + 1
+                continue
+        if not SKIPPED_LINE_RE.match(line):
+            yield line
+        i += 1
+
+def parse_org(text: str, file: str) -> list[dict]:
+    """Extract the tasks and events of an org document, in document order."""
+    lines = text.split("\n")
+    keywords = sorted(todo_keywords(lines), key=len, reverse=True)
+    todo_re = re.compile("(" + "|".join(map(re.escape, keywords)) + r")(?: |$)")
+    inherited = file_tags(lines)
+
+    headlines = [i for i, line in enumerate(lines) if HEADLINE_RE.match(line)]
+    results = []
+    stack = [] # (level, title, local tags) of the current headline's ancestors
+    for n, start in enumerate(headlines):
+        end = headlines[n + 1] if n + 1 < len(headlines) else len(lines)
+        stars, rest = HEADLINE_RE.match(lines[start]).groups()
+        level = len(stars)
+        todo, title, local_tags = parse_headline(rest, todo_re)
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
+        path = [h[1] for h in stack] + [title]
+        tags = merge_tags(inherited + [t for h in stack for t in h[2]] + local_tags)
+        stack.append((level, title, local_tags))
+
+        # Planning must be the line right after the headline, then the property drawer
+        body = start + 1
+        scheduled = deadline = None
+        if body < end and PLANNING_LINE_RE.match(lines[body]):
+            line = lines[body]
+            for m in PLANNING_KEYWORD_RE.finditer(line):
+                raw = RAW_TIMESTAMP_RE.match(line, m.end())
+                if raw is None or not TIMESTAMP_RE.match(line, m.end()):
+                    continue
+                if m.group(1) == "SCHEDULED":
+                    scheduled = raw.group(0)
+                elif m.group(1) == "DEADLINE":
+                    deadline = raw.group(0)
+            body += 1
+        properties = {}
+        if body < end and PROPERTIES_RE.match(lines[body]):
+            drawer_end = next((j for j in range(body + 1, end) if END_RE.match(lines[j])), None)
+            if drawer_end is not None:
+                for line in lines[body + 1:drawer_end]:
+                    m = PROPERTY_RE.match(line)
+                    if m:
+                        key, append, value = m.group(1).upper(), m.group(2), m.group(3) or ""
+                        if append and key in properties:
+                            value = f"{properties[key]} {value}"
+                        properties[key] = value
+                body = drawer_end + 1
+
+        timestamps = [raw for line in section_lines(lines[body:end]) for raw in find_timestamps(line)]
+        if not (todo or scheduled or deadline or timestamps):
+            continue
+
+        entry = {
+            "title": title,
+            "todo": todo,
+            "tags": tags or None,
+            "file": file,
+            "parent": parent,
+            "id": properties.get("ID"),
+            "path": path,
+            "index": 0,
+            "kind": "task" if (todo or scheduled or deadline) else "event",
+        }
+        if scheduled:
+            entry |= parse_timestamp(scheduled, "scheduled")
+        if deadline:
+            entry |= parse_timestamp(deadline, "deadline")
+        if not timestamps:
+            results.append(entry)
+        for index, raw in enumerate(timestamps):
+            results.append(entry | {"index": index} | parse_timestamp(raw, "timestamp"))
+    return results
+
+def parse_org_path(file_path: str) -> list[dict]:
+    file_path = os.path.abspath(file_path)
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_org(f.read(), file_path)
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("command", choices=["compare", "bench"])
+    arg_parser.add_argument("files", nargs="+")
+    arg_parser.add_argument("--rounds", type=int, default=5, help="Passes over FILES for bench")
+    args = arg_parser.parse_args()
+
+    from .parser import OrgParserWorker
+    emacs = OrgParserWorker()
+
+    if args.command == "compare":
+        mismatched = 0
+        for path in args.files:
+            path = os.path.abspath(path)
+            try:
+                expected = emacs.parse(path)
+            except Exception as e:
+                expected = f"error: {e}"
+            try:
+                actual = parse_org_path(path)
+            except Exception as e:
+                actual = f"error: {e}"
+            if isinstance(expected, str) or isinstance(actual, str):
+                same = isinstance(expected, str) == isinstance(actual, str)
+            else:
+                same = expected == actual
+            if not same:
+                mismatched += 1
+                print(f"MISMATCH {path}")
+                if isinstance(expected, str) or isinstance(actual, str):
+                    print(f"  emacs:  {expected if isinstance(expected, str) else 'ok'}")
+                    print(f"  python: {actual if isinstance(actual, str) else 'ok'}")
+                else:
+                    for i, (e, a) in enumerate(zip(expected, actual)):
+                        if e != a:
+                            diff = {k: (e.get(k), a.get(k)) for k in e.keys() | a.keys() if e.get(k) != a.get(k)}
+                            print(f"  entry {i}: " + json.dumps(diff))
+                            break
+                    if len(expected) != len(actual):
+                        print(f"  emacs: {len(expected)} entries, python: {len(actual)}")
+        emacs.stop()
+        print(f"{len(args.files) - mismatched}/{len(args.files)} files identical")
+        raise SystemExit(1 if mismatched else 0)
+
+    size = sum(os.path.getsize(p) for p in args.files)
+    for name, parse in (("emacs", lambda p: emacs.parse(os.path.abspath(p))), ("python", parse_org_path)):
+        parse(args.files[0]) # Warm up, Emacs loads org on the first file
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            entries = sum(len(parse(p)) for p in args.files)
+        elapsed = (time.perf_counter() - started) / args.rounds
+        print(f"{name:>6}: {elapsed * 1000:8.1f} ms per pass, {size / elapsed / 1e6:6.2f} MB/s, {entries} entries")
+    emacs.stop()
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger("org-cal.parser")
+
+PARSE_CACHE_DIR = Path(os.getenv("PARSE_CACHE_DIR", "/data/parse-cache"))
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "256")) # Max entries, 0 disables
+
+class ParseCache:
+    """
+    On-disk cache of parser output, keyed by file contents.
+
+    Keys are the SHA-256 of the file path, the file's bytes and the parser
+    script itself, so editing org-to-json.el invalidates every entry.
+    Each entry is a file of one JSON task per line, so it is written and
+    read back one task at a time; its mtime records the last time it was
+    used, and the least recently used entries are evicted past SIZE.
+    """
+
+    def __init__(self, script_path: Path, directory: Path = PARSE_CACHE_DIR, size: int = PARSE_CACHE_SIZE):
+        self.directory = directory
+        self.size = size
+        self.script_hash = hashlib.sha256(script_path.read_bytes()).hexdigest()
+
+    def key(self, file_path: str) -> str:
+        h = hashlib.sha256()
+        h.update(self.script_hash.encode())
+        h.update(file_path.encode() + b"\0")
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.jsonl"
+
+    def contains(self, key: str) -> bool:
+        """True if KEY has an entry, which is marked as recently used."""
+        if not self.size:
+            return False
+        try:
+            os.utime(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get(self, key: str):
+        """Return an iterator over the cached tasks for KEY, or None on a miss."""
+        if not self.size:
+            return None
+        path = self.path(key)
+        try:
+            f = open(path, "r")
+        except FileNotFoundError:
+            return None
+        os.utime(path) # Mark as recently used
+        return self._read(path, f)
+
+    @staticmethod
+    def _read(path: Path, f):
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    path.unlink(missing_ok=True) # Parsed again on the next attempt
+                    raise
+
+    def record(self, key: str, tasks):
+        """
+        Pass TASKS through, storing them as the entry of KEY once every one
+        of them was read. Nothing is stored if TASKS fails or is abandoned.
+        """
+        if not self.size:
+            yield from tasks
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        stored = False
+        try:
+            with open(tmp, "w") as f:
+                for task in tasks:
+                    f.write(json.dumps(task) + "\n")
+                    yield task
+            os.replace(tmp, path) # Readers never see a half-written entry
+            stored = True
+        finally:
+            if not stored:
+                tmp.unlink(missing_ok=True)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries beyond the configured size."""
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True) # Whole-file entries from before tasks were stored per line
+        entries = []
+        for path in self.directory.glob("*.jsonl"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort(reverse=True)
+        for _, path in entries[self.size:]:
+            path.unlink(missing_ok=True)
+            logger.debug(f"Evicted parse cache entry {path.name}")
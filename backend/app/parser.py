@@ -1,97 +1,480 @@
 import subprocess
+import threading
+import queue
+import logging
 import os
 import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from sqlalchemy import delete, func, insert, select, literal, text
 from .db import SessionLocal
-from .models import Task
+from .models import Task, TaskTag, Generation, ViewEntry, current_generation
+from .parse_cache import ParseCache
+from . import org_parser
+
+logger = logging.getLogger("org-cal.parser")
 
 SCRIPT_PATH = Path(__file__).parent / "org-to-json.el"
+TIMEZONE = os.getenv("TIMEZONE", "UTC")
+PARSE_TIMEOUT = int(os.getenv("PARSE_TIMEOUT_SECONDS", "120"))
+UID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "org-calendar-server")
+PARSE_CONCURRENCY = max(1, int(os.getenv("PARSE_CONCURRENCY", str(os.cpu_count() or 1))))
+IMPORT_BATCH = 5000 # Rows per executemany INSERT
+ORG_PARSER = os.getenv("ORG_PARSER", "emacs").lower() # "emacs" or "python", see org_parser.py
 
 def get_org_files() -> list[str]:
     files = os.getenv("ORG_FILES", "")
     return [f.strip() for f in files.split(",") if f.strip()]
 
-def parse_org_file(file_path: str) -> list[dict]:
-    """Run Emacs in batch mode to extract tasks from an org file as JSON."""
-    cmd = [
-        "emacs", "--batch",
-        "-l", str(SCRIPT_PATH),
-        "--eval", f"(find-file \"{file_path}\")",
-        "-f", "cal-server/org-extract-tasks"
-    ]
+class OrgParserWorker:
+    """
+    Long-lived Emacs process that parses org files on request.
+
+    Emacs loads org-to-json.el once and then reads one file path per line
+    from stdin, answering each with one line of JSON per task and a final
+    {"end": COUNT} line, so tasks are decoded as they arrive rather than
+    from one large document. If the process dies, or a file takes longer
+    than TIMEOUT seconds, the process is killed and a fresh one is started
+    for the next file.
+    """
+
+    def __init__(self, timeout: int = PARSE_TIMEOUT):
+        self.timeout = timeout
+        self.proc = None
+        self.lines = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        cmd = [
+            "emacs", "--batch",
+            "-l", str(SCRIPT_PATH),
+            "-f", "cal-server/org-extract-stream-server"
+        ]
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        # stdout is drained on a thread so reads can time out
+        self.lines = queue.Queue()
+        threading.Thread(
+            target=self._read_output, args=(self.proc, self.lines), daemon=True
+        ).start()
+        logger.info(f"Started Emacs parser (pid {self.proc.pid})")
+
+    @staticmethod
+    def _read_output(proc, lines):
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None) # EOF, the process has exited
+
+    def stop(self):
+        if self.proc is not None:
+            self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+
+    def is_alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
 
-    result = subprocess.run(
-        cmd, capture_output=True, text=True, check=True
-    )
-    return json.loads(result.stdout)
+    def stream(self, file_path: str):
+        """
+        Yield the tasks of FILE_PATH one at a time, as Emacs prints them.
+        The worker is held until the generator is exhausted; closing it
+        early restarts Emacs, since the rest of its answer would be unread.
+        """
+        with self.lock:
+            if not self.is_alive():
+                self.stop()
+                self.start()
+            try:
+                self.proc.stdin.write(file_path + "\n")
+                self.proc.stdin.flush()
+            except (BrokenPipeError, OSError):
+                self.stop()
+                raise RuntimeError(f"Emacs parser exited before reading {file_path}")
 
-def refresh_db():
+            deadline = time.monotonic() + self.timeout
+            finished = False
+            try:
+                while True:
+                    try:
+                        line = self.lines.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        raise TimeoutError(f"Parsing {file_path} took longer than {self.timeout}s")
+                    if line is None:
+                        raise RuntimeError(f"Emacs parser exited while parsing {file_path}")
+                    result = json.loads(line)
+                    if "end" in result:
+                        finished = True
+                        return
+                    if "error" in result:
+                        finished = True
+                        raise RuntimeError(f"Failed to parse {file_path}: {result['error']}")
+                    yield result
+            finally:
+                if not finished:
+                    self.stop()
+
+    def parse(self, file_path: str) -> list[dict]:
+        return list(self.stream(file_path))
+
+class OrgParserPool:
     """
-    Wipe existing rows in the database so we can re-import.
+    Fixed set of parser workers shared between threads.
+
+    Each call borrows an idle worker for the duration of one file, so at
+    most SIZE Emacs processes run at once. Workers start lazily, on the
+    first file they are handed.
+    """
+
+    def __init__(self, size: int = PARSE_CONCURRENCY):
+        self.workers = [OrgParserWorker() for _ in range(size)]
+        self.idle = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+
+    def stream(self, file_path: str):
+        worker = self.idle.get()
+        try:
+            yield from worker.stream(file_path)
+        finally:
+            self.idle.put(worker)
+
+    def parse(self, file_path: str) -> list[dict]:
+        return list(self.stream(file_path))
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+_pool = OrgParserPool()
+_cache = ParseCache(Path(org_parser.__file__) if ORG_PARSER == "python" else SCRIPT_PATH)
+
+def parse_source(file_path: str):
+    """Tasks of FILE_PATH as the configured parser yields them, bypassing the cache."""
+    if ORG_PARSER == "python":
+        return iter(org_parser.parse_org_path(file_path))
+    return _pool.stream(file_path)
+
+def stream_org_file(file_path: str):
+    """
+    Yield the tasks of an org file, using the shared Emacs parser, or the
+    in-process one when ORG_PARSER is "python". Files whose contents were
+    parsed before are read back from the parse cache one task at a time.
+    """
+    key = _cache.key(file_path)
+    tasks = _cache.get(key)
+    if tasks is None:
+        tasks = _cache.record(key, parse_source(file_path))
+    yield from tasks
+
+def cache_org_file(file_path: str):
+    """Parse FILE_PATH into the parse cache, unless it is there already."""
+    key = _cache.key(file_path)
+    if not _cache.contains(key):
+        for _ in _cache.record(key, parse_source(file_path)):
+            pass
+
+def parse_org_files(files: list[str]):
+    """
+    Prepare FILES for import.
+
+    Returns (parsed, errors): PARSED is a list of (file, tasks) pairs in
+    the order of FILES, where TASKS is an iterator that parses or reads
+    back the file's tasks as it is consumed, and ERRORS maps each file
+    that failed to a message. A failure in one file does not stop the
+    others.
+
+    With the parse cache enabled, files missing from it are first parsed
+    into it concurrently, up to PARSE_CONCURRENCY at a time, so their tasks
+    are never held in memory together. Without it, each file is parsed
+    while it is imported, and may still fail then (see replace_tasks).
+    """
+    errors = {}
+    if _cache.size:
+        with ThreadPoolExecutor(max_workers=PARSE_CONCURRENCY) as executor:
+            futures = [(f, executor.submit(cache_org_file, f)) for f in files]
+            for f, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed to parse {f}: {e}")
+                    errors[f] = str(e)
+    # An entry evicted since is parsed again while it is imported
+    parsed = [(f, stream_org_file(f)) for f in files if f not in errors]
+    return parsed, errors
+
+def stop_parser():
+    """Shut down the shared Emacs parser processes."""
+    _pool.stop()
+
+def imported_commit():
+    """
+    Return (commit, failed files) of the current generation: the commit it
+    was imported from, and the files that failed to parse at that commit
+    and still need to be retried.
     """
     session = SessionLocal()
     try:
-        session.query(Task).delete()
-        session.commit()
+        generation = session.get(Generation, current_generation(session))
+        if generation is None:
+            return None, []
+        return generation.commit_hash, json.loads(generation.failed_files or "[]")
     finally:
         session.close()
-            
 
-def import_tasks(parsed_tasks: list[dict]):
+def task_tags(task: dict) -> list[str]:
+    """Distinct tags of a parsed task, which may list them or comma-join them."""
+    tags = task.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return list(dict.fromkeys(t for t in tags if t))
+
+@lru_cache(maxsize=65536) # Org files repeat the same few dates and times a lot
+def local_to_utc(date_str, time_str=None):
     """
-    Import parsed tasks into the database
+    Convert org date/time strings in TIMEZONE to a naive UTC datetime.
+    A date without a time is taken as local midnight.
+    """
+    if not date_str:
+        return None
+    local = datetime.strptime(f"{date_str} {time_str or '00:00'}", "%Y-%m-%d %H:%M")
+    return local.replace(tzinfo=ZoneInfo(TIMEZONE)).astimezone(timezone.utc).replace(tzinfo=None)
+
+def time_span(task: dict, prefix: str):
+    """
+    (start, end) of one of a task's timestamps as naive UTC. Ends are
+    exclusive, so an all-day timestamp ends at midnight after its last day.
+    """
+    start_date = task.get(f"{prefix}_start_date")
+    if not start_date:
+        return None, None
+    start_time = task.get(f"{prefix}_start_time")
+    start = local_to_utc(start_date, start_time)
+    end_date = task.get(f"{prefix}_end_date") or start_date
+    end_time = task.get(f"{prefix}_end_time")
+    if end_time:
+        end = local_to_utc(end_date, end_time)
+    elif start_time:
+        end = start
+    else:
+        next_day = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+        end = local_to_utc(next_day.strftime("%Y-%m-%d"))
+    return start, end
+
+def task_times(task: dict) -> dict:
+    """Normalized time columns: events span their timestamp, tasks their scheduled, deadline or timestamp."""
+    spans = {prefix: time_span(task, prefix) for prefix in ("scheduled", "deadline", "timestamp")}
+    order = ("timestamp",) if task.get("kind") == "event" else ("scheduled", "deadline", "timestamp")
+    start, end = next((spans[p] for p in order if spans[p][0]), (None, None))
+    return {
+        "start_at": start,
+        "end_at": end,
+        "scheduled_at": spans["scheduled"][0],
+        "deadline_at": spans["deadline"][0],
+    }
+
+def task_row(task: dict) -> dict:
+    """Map one parsed task to a row of column values for the tasks table."""
+    return task_times(task) | {
+        "title": task.get("title"),
+        "todo": task.get("todo"),
+        "tags": ",".join(task.get("tags")) if isinstance(task.get("tags"), list) else task.get("tags"),
+        "file": task.get("file"),
+        "parent": task.get("parent"),
+        "kind": task.get("kind"),
+
+        "scheduled_start_date": task.get("scheduled_start_date"),
+        "scheduled_start_time": task.get("scheduled_start_time"),
+        "scheduled_end_date": task.get("scheduled_end_date"),
+        "scheduled_end_time": task.get("scheduled_end_time"),
+        "scheduled_all_day": task.get("scheduled_all_day", False),
+        "scheduled_repeater_type": task.get("scheduled_repeater_type"),
+        "scheduled_repeater_value": task.get("scheduled_repeater_value"),
+        "scheduled_repeater_unit": task.get("scheduled_repeater_unit"),
+        "scheduled_warning_type": task.get("scheduled_warning_type"),
+        "scheduled_warning_value": task.get("scheduled_warning_value"),
+        "scheduled_warning_unit": task.get("scheduled_warning_unit"),
+
+        "deadline_start_date": task.get("deadline_start_date"),
+        "deadline_start_time": task.get("deadline_start_time"),
+        "deadline_end_date": task.get("deadline_end_date"),
+        "deadline_end_time": task.get("deadline_end_time"),
+        "deadline_all_day": task.get("deadline_all_day", False),
+        "deadline_repeater_type": task.get("deadline_repeater_type"),
+        "deadline_repeater_value": task.get("deadline_repeater_value"),
+        "deadline_repeater_unit": task.get("deadline_repeater_unit"),
+        "deadline_warning_type": task.get("deadline_warning_type"),
+        "deadline_warning_value": task.get("deadline_warning_value"),
+        "deadline_warning_unit": task.get("deadline_warning_unit"),
+
+        "ts_start_date": task.get("timestamp_start_date"),
+        "ts_start_time": task.get("timestamp_start_time"),
+        "ts_end_date": task.get("timestamp_end_date"),
+        "ts_end_time": task.get("timestamp_end_time"),
+        "ts_all_day": task.get("timestamp_all_day", False),
+        "ts_repeater_type": task.get("timestamp_repeater_type"),
+        "ts_repeater_value": task.get("timestamp_repeater_value"),
+        "ts_repeater_unit": task.get("timestamp_repeater_unit"),
+        "ts_warning_type": task.get("timestamp_warning_type"),
+        "ts_warning_value": task.get("timestamp_warning_value"),
+        "ts_warning_unit": task.get("timestamp_warning_unit"),
+    }
 
-    
+def task_uid(task: dict, seen: dict) -> str:
     """
+    Derive a stable UID from where an entry lives: its file, its org ID
+    (or outline path without one) and which of the headline's timestamps
+    it came from. SEEN counts identities already used in this file, so
+    duplicate headlines still get distinct UIDs.
+    """
+    anchor = task.get("id") or "/".join(task.get("path") or [task.get("title") or ""])
+    identity = f"{task.get('file')}\0{anchor}\0{task.get('index') or 0}"
+    n = seen.get(identity, 0)
+    seen[identity] = n + 1
+    if n:
+        identity += f"\0{n}"
+    return str(uuid.uuid5(UID_NAMESPACE, identity))
+
+def import_tasks(parsed_tasks, session=None, generation=None):
+    """
+    Import parsed tasks, any iterable of task dicts, into the database.
+
+    Rows are written with executemany INSERTs of IMPORT_BATCH rows, into
+    GENERATION or the current one, so tasks are consumed as they are
+    produced. When SESSION is given the caller owns the transaction,
+    otherwise it is committed here. Returns the number of tasks imported.
+    """
+    own_session = session is None
+    session = session or SessionLocal()
+    try:
+        imported = 0
+        if generation is None:
+            generation = current_generation(session)
+        # Ids are assigned here rather than read back, so tag rows can be
+        # written in the same executemany style. Imports run one at a time.
+        first_id = (session.scalar(select(func.max(Task.id))) or 0) + 1
+        seen = {}
+        tasks = iter(parsed_tasks)
+        connection = session.connection()
+        while batch := list(islice(tasks, IMPORT_BATCH)):
+            rows = [
+                task_row(t) | {"id": first_id + i, "generation": generation, "uid": task_uid(t, seen)}
+                for i, t in enumerate(batch)
+            ]
+            tag_rows = [
+                {"task_id": first_id + i, "tag": tag}
+                for i, t in enumerate(batch)
+                for tag in task_tags(t)
+            ]
+            connection.execute(insert(Task.__table__), rows)
+            if tag_rows:
+                connection.execute(insert(TaskTag.__table__), tag_rows)
+            first_id += len(batch)
+            imported += len(batch)
+        if own_session:
+            session.commit()
+        return imported
+    finally:
+        if own_session:
+            session.close()
+
+def replace_tasks(parsed: list[tuple[str, list[dict]]], files=None, commit_hash=None, failed_files=None, before_commit=None):
+    """
+    Publish a new generation holding freshly PARSED (file, tasks) pairs in
+    place of the rows of FILES. With FILES as None, the new generation
+    holds only PARSED; otherwise rows of every other file are carried over.
+
+    Each file's TASKS may be any iterable, consumed straight into the
+    import. If it fails part way, that file's rows are rolled back, it
+    keeps its previous rows, and it is added to FAILED_FILES, a dict of
+    the files that failed to parse and their errors.
+
+    The new rows are invisible until the commit that also records the new
+    generation, so readers keep serving the previous one until then.
+    BEFORE_COMMIT(session, generation) can add rows derived from the new
+    generation to the same transaction. COMMIT_HASH and FAILED_FILES are
+    recorded with the generation, see imported_commit. Returns the number
+    of tasks imported.
+    """
+    failed_files = {} if failed_files is None else failed_files
     session = SessionLocal()
     try:
-        for task in parsed_tasks:
-            db_task = Task(
-                title=task.get("title"),
-                todo=task.get("todo"),
-                tags=",".join(task.get("tags")) if isinstance(task.get("tags"), list) else task.get("tags"),
-                file=task.get("file"),
-                parent=task.get("parent"),
-                kind=task.get("kind"),
-                
-                scheduled_start_date=task.get("scheduled_start_date"),
-                scheduled_start_time=task.get("scheduled_start_time"),
-                scheduled_end_date=task.get("scheduled_end_date"),
-                scheduled_end_time=task.get("scheduled_end_time"),
-                scheduled_all_day=task.get("scheduled_all_day", False),
-                scheduled_repeater_type=task.get("scheduled_repeater_type"),
-                scheduled_repeater_value=task.get("scheduled_repeater_value"),
-                scheduled_repeater_unit=task.get("scheduled_repeater_unit"),
-                scheduled_warning_type=task.get("scheduled_warning_type"),
-                scheduled_warning_value=task.get("scheduled_warning_value"),
-                scheduled_warning_unit=task.get("scheduled_warning_unit"),
-                
-                deadline_start_date=task.get("deadline_start_date"),
-                deadline_start_time=task.get("deadline_start_time"),
-                deadline_end_date=task.get("deadline_end_date"),
-                deadline_end_time=task.get("deadline_end_time"),
-                deadline_all_day=task.get("deadline_all_day", False),
-                deadline_repeater_type=task.get("deadline_repeater_type"),
-                deadline_repeater_value=task.get("deadline_repeater_value"),
-                deadline_repeater_unit=task.get("deadline_repeater_unit"),
-                deadline_warning_type=task.get("deadline_warning_type"),
-                deadline_warning_value=task.get("deadline_warning_value"),
-                deadline_warning_unit=task.get("deadline_warning_unit"),
-                
-                ts_start_date=task.get("timestamp_start_date"),
-                ts_start_time=task.get("timestamp_start_time"),
-                ts_end_date=task.get("timestamp_end_date"),
-                ts_end_time=task.get("timestamp_end_time"),
-                ts_all_day=task.get("timestamp_all_day", False),
-                ts_repeater_type=task.get("timestamp_repeater_type"),
-                ts_repeater_value=task.get("timestamp_repeater_value"),
-                ts_repeater_unit=task.get("timestamp_repeater_unit"),
-                ts_warning_type=task.get("timestamp_warning_type"),
-                ts_warning_value=task.get("timestamp_warning_value"),
-                ts_warning_unit=task.get("timestamp_warning_unit"),                
+        previous = current_generation(session)
+        generation = Generation(commit_hash=commit_hash)
+        session.add(generation)
+        session.flush()
+
+        imported = 0
+        for file, tasks in parsed:
+            savepoint = session.begin_nested()
+            try:
+                imported += import_tasks(tasks, session, generation.id)
+            except Exception as e:
+                savepoint.rollback()
+                logger.error(f"Failed to parse {file}: {e}")
+                failed_files[file] = str(e)
+            else:
+                savepoint.commit()
+
+        if files is not None:
+            # Carried rows get their old id shifted just past every existing
+            # id, so their tags follow them by id alone and ids only grow by
+            # the span of the carried rows. A uid may appear more than once
+            # in a generation (see import_org_files with refresh=False).
+            replaced = [f for f in files if f not in failed_files]
+            kept = (Task.generation == previous, Task.file.not_in(replaced))
+            lowest = session.scalar(select(func.min(Task.id)).where(*kept))
+            offset = (session.scalar(select(func.max(Task.id))) or 0) - (lowest or 0) + 1
+            columns = [c for c in Task.__table__.columns if c.name not in ("id", "generation")]
+            carried = select(Task.id + offset, *columns, literal(generation.id)).where(*kept)
+            session.execute(
+                insert(Task).from_select(["id"] + [c.name for c in columns] + ["generation"], carried)
             )
-            session.add(db_task)
-        session.commit()
+            carried_tags = (
+                select(TaskTag.task_id + offset, TaskTag.tag)
+                .join(Task, Task.id == TaskTag.task_id)
+                .where(*kept)
+            )
+            session.execute(
+                insert(TaskTag).from_select(["task_id", "tag"], carried_tags)
+            )
+        generation.failed_files = json.dumps(sorted(failed_files)) if failed_files else None
+        if before_commit is not None:
+            before_commit(session, generation.id)
+        session.commit() # The swap: readers see the new generation from here on
     finally:
         session.close()
 
+    # The previous generation stays until the next swap, so a reader that
+    # looked up the pointer just before this commit can still finish
+    prune_generations(previous)
+    return imported
+
+def prune_generations(keep: int):
+    """Drop rows of generations older than KEEP."""
+    session = SessionLocal()
+    try:
+        old_ids = select(Task.id).where(Task.generation < keep)
+        session.execute(delete(ViewEntry).where(ViewEntry.generation < keep))
+        session.execute(delete(TaskTag).where(TaskTag.task_id.in_(old_ids)))
+        session.execute(delete(Task).where(Task.generation < keep))
+        session.execute(delete(Generation).where(Generation.id < keep))
+        session.commit()
+        # Fresh statistics let the planner pick the time and tag indexes
+        # over the barely selective generation index
+        session.execute(text("ANALYZE"))
+        session.commit()
+    finally:
+        session.close()
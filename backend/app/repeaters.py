@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from dateutil.rrule import rrule, HOURLY, DAILY, WEEKLY, MONTHLY, YEARLY
+
+from .parser import TIMEZONE
+
+# Org repeater units to RRULE frequencies. All three org repeater types
+# ("+" cumulate, "++" catch-up, ".+" restart) describe the same series from
+# the timestamp onward; they only differ in how org shifts the date when an
+# entry is marked done.
+FREQUENCIES = {"h": HOURLY, "d": DAILY, "w": WEEKLY, "m": MONTHLY, "y": YEARLY}
+FREQUENCY_NAMES = {"h": "HOURLY", "d": "DAILY", "w": "WEEKLY", "m": "MONTHLY", "y": "YEARLY"}
+FIXED_STEPS = {"h": timedelta(hours=1), "d": timedelta(days=1), "w": timedelta(weeks=1)}
+# org-element names the units in full, the timestamp syntax uses their first letter
+UNIT_NAMES = {"hour": "h", "day": "d", "week": "w", "month": "m", "year": "y"}
+
+MAX_OCCURRENCES = 1000 # Per entry and window, however wide the window is
+
+def repeat_prefix(task):
+    """
+    Which timestamp of a row repeats: the one its start_at came from.
+    Returns the column prefix ("ts", "scheduled" or "deadline") or None,
+    also for repeaters that do not advance (like "+0d").
+    """
+    order = ("ts",) if task.kind == "event" else ("scheduled", "deadline", "ts")
+    for prefix in order:
+        if getattr(task, f"{prefix}_start_date"):
+            return prefix if repeater(task, prefix) is not None else None
+    return None
+
+def repeater(task, prefix):
+    """(unit, interval) of a timestamp's repeater, or None if it has none."""
+    unit = getattr(task, f"{prefix}_repeater_unit")
+    unit = UNIT_NAMES.get(unit, unit)
+    value = getattr(task, f"{prefix}_repeater_value")
+    if unit not in FREQUENCIES or not value:
+        return None
+    return unit, int(value)
+
+def to_rrule(task, prefix):
+    """The repeater of a timestamp as an icalendar RRULE value, or None."""
+    rep = repeater(task, prefix)
+    if rep is None:
+        return None
+    unit, interval = rep
+    return {"freq": FREQUENCY_NAMES[unit], "interval": interval}
+
+def to_local(utc):
+    """Naive UTC to naive wall-clock time in TIMEZONE."""
+    return utc.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(TIMEZONE)).replace(tzinfo=None)
+
+@lru_cache(maxsize=4096)
+def occurrence_starts(start: datetime, unit: str, interval: int, lo: datetime, hi: datetime) -> tuple:
+    """
+    Starts of a series within [LO, HI), all naive wall-clock times.
+
+    Fixed-length units jump straight to the first occurrence at or after
+    LO, so years of hourly or daily history cost nothing. Months and years
+    go through dateutil, which skips dates a month does not have (the 31st
+    in April), matching how clients read the RRULE. At most
+    MAX_OCCURRENCES starts are produced. Results are memoized, so feeds
+    polled with the same window reuse them.
+    """
+    if unit in FIXED_STEPS:
+        step = FIXED_STEPS[unit] * interval
+        skip = max(0, -(-(lo - start) // step)) # ceil, never before the series starts
+        first = start + skip * step
+        starts = []
+        current = first
+        while current < hi and len(starts) < MAX_OCCURRENCES:
+            starts.append(current)
+            current += step
+        return tuple(starts)
+
+    rule = rrule(FREQUENCIES[unit], interval=interval, dtstart=start)
+    starts = []
+    for current in rule.xafter(max(start, lo), inc=True):
+        if current >= hi or len(starts) >= MAX_OCCURRENCES:
+            break
+        starts.append(current)
+    return tuple(starts)
+
+def expand(task, lo, hi):
+    """
+    Lazily yield the occurrences of a repeating row that fall in the UTC
+    window [LO, HI), as overrides for its timestamp fields (for example
+    ts_start_date / ts_start_time / ts_end_date / ts_end_time).
+    Rows without a repeater, or an unbounded window, yield nothing.
+    """
+    prefix = repeat_prefix(task)
+    if prefix is None or lo is None or hi is None:
+        return
+    unit, interval = repeater(task, prefix)
+
+    start_date = getattr(task, f"{prefix}_start_date")
+    start_time = getattr(task, f"{prefix}_start_time")
+    end_date = getattr(task, f"{prefix}_end_date") or start_date
+    end_time = getattr(task, f"{prefix}_end_time")
+    start = datetime.strptime(f"{start_date} {start_time or '00:00'}", "%Y-%m-%d %H:%M")
+    end = datetime.strptime(f"{end_date} {end_time or start_time or '00:00'}", "%Y-%m-%d %H:%M")
+    duration = max(end - start, timedelta(0))
+
+    # Widen by the duration so occurrences that began before LO but still
+    # overlap the window are kept
+    window_lo = to_local(lo) - duration
+    for occurrence in occurrence_starts(start, unit, interval, window_lo, to_local(hi)):
+        finish = occurrence + duration
+        yield {
+            f"{prefix}_start_date": occurrence.strftime("%Y-%m-%d"),
+            f"{prefix}_start_time": occurrence.strftime("%H:%M") if start_time else None,
+            f"{prefix}_end_date": finish.strftime("%Y-%m-%d") if getattr(task, f"{prefix}_end_date") else None,
+            f"{prefix}_end_time": finish.strftime("%H:%M") if end_time else None,
+        }
+
+def occurrences(task, window, prefix):
+    """
+    Field overrides for each occurrence of a row within WINDOW, a (lo, hi)
+    pair, when the timestamp that repeats is PREFIX (the one the caller
+    serializes). Any other row, or a window open on either side, gives a
+    single empty override: the row as stored.
+    """
+    lo, hi = window
+    if repeat_prefix(task) != prefix or lo is None or hi is None:
+        yield {}
+        return
+    yield from expand(task, lo, hi)
+
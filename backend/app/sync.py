@@ -1,11 +1,21 @@
 import os
+import shlex
 import subprocess
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.orm import Session
 from .db import SessionLocal
-from .models import Snapshot
+from .models import Snapshot, serialize_snapshot
+from .parser import get_org_files
 
 REPO_DIR = "/data/repo"
+REPO_BRANCH = os.getenv("REPO_BRANCH", "main")
+SYNC_FETCH_DEPTH = int(os.getenv("SYNC_FETCH_DEPTH", "1")) # 0 fetches full history
+SYNC_SPARSE = os.getenv("SYNC_SPARSE", "true").lower() in ("1", "true", "yes")
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "200"))              # Always kept, newest first
+SNAPSHOT_MAX_AGE_DAYS = int(os.getenv("SNAPSHOT_MAX_AGE_DAYS", "30")) # Older ones beyond SNAPSHOT_KEEP are dropped
+SNAPSHOT_LOG_LIMIT = int(os.getenv("SNAPSHOT_LOG_LIMIT", "4000"))   # Characters of git output stored per snapshot
+TRUNCATED = "[...]\n"
 
 def run_cmd(cmd, cwd=None):
     result = subprocess.run(
@@ -15,7 +25,7 @@ def run_cmd(cmd, cwd=None):
 
 def sync_repo():
     repo_url = os.getenv("REPO_URL")
-    branch = os.getenv("REPO_BRANCH", "main")
+    branch = REPO_BRANCH
     github_token = os.getenv("GITHUB_TOKEN")
 
     if github_token and repo_url.startswith("https://"):
@@ -26,30 +36,49 @@ def sync_repo():
     db: Session = SessionLocal()
     snapshot = Snapshot(timestamp=datetime.utcnow())
 
+    changed = True
     try:
         if not os.path.exists(REPO_DIR):
-            code, out, err = run_cmd(f"git clone -b {branch} {repo_url} {REPO_DIR}")
-        else:
-            code, out, err = run_cmd("git fetch origin", cwd=REPO_DIR)
+            # Blobs are only downloaded for the files that get checked out
+            code, out, err = run_cmd(f"git clone {fetch_options()} --no-checkout -b {branch} {repo_url} {REPO_DIR}")
+            if code == 0:
+                code, out, err = configure_sparse_checkout()
             if code == 0:
-                code, out, err = run_cmd(f"git reset --hard origin/{branch}", cwd=REPO_DIR)
+                code, out, err = run_cmd(f"git checkout {branch}", cwd=REPO_DIR)
+        else:
+            head = remote_head(repo_url, branch)
+            if head is not None and head == local_head() and head == latest_commit():
+                changed = False
+                code, out, err = 0, "", ""
+                if not sparse_checkout_current():
+                    # ORG_FILES or SYNC_SPARSE changed since the last checkout
+                    code, out, err = configure_sparse_checkout()
+            else:
+                code, out, err = run_cmd(f"git fetch {fetch_options()} origin {branch}", cwd=REPO_DIR)
+                if code == 0:
+                    code, out, err = configure_sparse_checkout()
+                if code == 0:
+                    code, out, err = run_cmd(f"git reset --hard origin/{branch}", cwd=REPO_DIR)
 
         if code != 0:
             snapshot.status = "failure"
             snapshot.log = err
         else:
-            code, out, err = run_cmd("git rev-parse HEAD", cwd=REPO_DIR)
-            snapshot.commit_hash = out.strip()
+            snapshot.commit_hash = local_head()
             snapshot.status = "success"
-            snapshot.log = out
+            snapshot.log = out if changed else f"Remote unchanged at {snapshot.commit_hash}"
 
     except Exception as e:
         snapshot.status = "failure"
         snapshot.log = str(e)
 
+    if snapshot.log and len(snapshot.log) > SNAPSHOT_LOG_LIMIT:
+        snapshot.log = truncate_log(snapshot.log)
+
     result = {
         "commit_hash": snapshot.commit_hash,
         "status": snapshot.status,
+        "changed": changed,
         "log": snapshot.log,
         "timestamp": snapshot.timestamp.isoformat(),
     }
@@ -58,4 +87,147 @@ def sync_repo():
     db.commit()    
     db.close()
     return result
-        
+
+def fetch_options():
+    """Partial, and by default shallow, fetches: history and blobs come on demand."""
+    options = "--filter=blob:none"
+    if SYNC_FETCH_DEPTH > 0:
+        options += f" --depth={SYNC_FETCH_DEPTH}"
+    return options
+
+def remote_head(repo_url, branch):
+    """Commit at the tip of BRANCH on the remote, or None if it cannot be read."""
+    code, out, err = run_cmd(f"git ls-remote {repo_url} refs/heads/{branch}")
+    if code != 0 or not out.strip():
+        return None
+    return out.split()[0]
+
+def local_head():
+    code, out, err = run_cmd("git rev-parse HEAD", cwd=REPO_DIR)
+    return out.strip() if code == 0 else None
+
+def sparse_patterns():
+    """
+    Sparse checkout patterns for the ORG_FILES inside the repo, or an
+    empty list to check out everything (SYNC_SPARSE off, or no org file
+    lives in the repo).
+    """
+    if not SYNC_SPARSE:
+        return []
+    return ["/" + os.path.relpath(os.path.normpath(f), REPO_DIR) for f in get_org_files() if in_repo(f)]
+
+def configure_sparse_checkout():
+    """Limit the working tree to sparse_patterns(), or check out everything."""
+    patterns = sparse_patterns()
+    if not patterns:
+        return run_cmd("git sparse-checkout disable", cwd=REPO_DIR)
+    return run_cmd(f"git sparse-checkout set --no-cone {' '.join(map(shlex.quote, patterns))}", cwd=REPO_DIR)
+
+def sparse_checkout_current():
+    """Whether the working tree is checked out with the current sparse_patterns()."""
+    enabled = run_cmd("git config --bool core.sparseCheckout", cwd=REPO_DIR)[1].strip() == "true"
+    if not enabled:
+        return not sparse_patterns()
+    code, out, err = run_cmd("git sparse-checkout list", cwd=REPO_DIR)
+    return code == 0 and sorted(out.splitlines()) == sorted(sparse_patterns())
+
+def truncate_log(log):
+    """Keep the tail of git's output, where the error usually is."""
+    return TRUNCATED + log[-(SNAPSHOT_LOG_LIMIT - len(TRUNCATED)):]
+
+def compact_snapshots():
+    """
+    Apply the snapshot retention policy and return what was removed.
+
+    - Runs of successful snapshots of the same commit are collapsed to
+      their first and last rows (when it appeared, when it was last seen).
+    - Beyond the newest SNAPSHOT_KEEP rows, snapshots older than
+      SNAPSHOT_MAX_AGE_DAYS are deleted.
+    - Logs longer than SNAPSHOT_LOG_LIMIT are truncated.
+
+    The newest successful snapshot is never removed, since it records the
+    commit the repo is synced to.
+    """
+    db: Session = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Snapshot.id, Snapshot.status, Snapshot.commit_hash, Snapshot.timestamp)
+            .order_by(Snapshot.id)
+        ).all()
+        latest_success = next((r.id for r in reversed(rows) if r.status == "success"), None)
+
+        collapsed = set()
+        for prev, row, nxt in zip(rows, rows[1:], rows[2:]):
+            run = (row.status == "success"
+                   and prev.status == nxt.status == "success"
+                   and prev.commit_hash == row.commit_hash == nxt.commit_hash)
+            if run:
+                collapsed.add(row.id)
+
+        cutoff = datetime.utcnow() - timedelta(days=SNAPSHOT_MAX_AGE_DAYS)
+        kept = [r for r in rows if r.id not in collapsed]
+        expired = {r.id for r in kept[:max(len(kept) - SNAPSHOT_KEEP, 0)] if r.timestamp < cutoff}
+
+        doomed = sorted((collapsed | expired) - {latest_success})
+        for i in range(0, len(doomed), 500):
+            db.execute(delete(Snapshot).where(Snapshot.id.in_(doomed[i:i + 500])))
+        truncated = db.execute(
+            update(Snapshot)
+            .where(func.length(Snapshot.log) > SNAPSHOT_LOG_LIMIT)
+            .values(log=TRUNCATED + func.substr(Snapshot.log, -(SNAPSHOT_LOG_LIMIT - len(TRUNCATED))))
+        ).rowcount
+        db.commit()
+        return {
+            "collapsed": len(collapsed - {latest_success}),
+            "expired": len(expired - collapsed - {latest_success}),
+            "truncated": truncated,
+            "remaining": len(rows) - len(doomed),
+        }
+    finally:
+        db.close()
+
+def list_snapshots(limit=50, before=None):
+    """
+    One page of sync history, newest first. Pass the last id of a page as
+    BEFORE to get the next one.
+    """
+    db: Session = SessionLocal()
+    try:
+        query = select(Snapshot).order_by(Snapshot.id.desc()).limit(limit)
+        if before is not None:
+            query = query.where(Snapshot.id < before)
+        return [serialize_snapshot(s) for s in db.scalars(query)]
+    finally:
+        db.close()
+
+def latest_commit():
+    """Return the commit hash of the most recent successful sync, if any."""
+    db: Session = SessionLocal()
+    try:
+        snapshot = (
+            db.query(Snapshot)
+            .filter(Snapshot.status == "success", Snapshot.commit_hash.isnot(None))
+            .order_by(Snapshot.id.desc())
+            .first()
+        )
+        return snapshot.commit_hash if snapshot else None
+    finally:
+        db.close()
+
+def changed_files(old_commit, new_commit):
+    """
+    Return absolute paths of files that differ between two commits.
+    Returns None if git cannot compare them (e.g. history was rewritten).
+    """
+    code, out, err = run_cmd(
+        f"git diff --name-only --no-renames {old_commit} {new_commit}", cwd=REPO_DIR
+    )
+    if code != 0:
+        return None
+    return {os.path.normpath(os.path.join(REPO_DIR, p)) for p in out.splitlines() if p}
+
+def in_repo(path):
+    """True if PATH lives inside the synced repository."""
+    rel = os.path.relpath(os.path.normpath(path), REPO_DIR)
+    return not rel.startswith("..")
+
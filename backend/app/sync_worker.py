@@ -1,16 +1,23 @@
-import asyncio
 import os
 import logging
+import queue
+import threading
+from collections import deque
+from datetime import datetime, timezone
 from .sync import sync_repo
 
 logger = logging.getLogger("org-cal.sync")
 
 SYNC_INTERVAL = int(os.getenv("SYNC_INTERVAL_SECONDS", "300"))
 SYNC_RETRY = int(os.getenv("SYNC_RETRY_SECONDS", "60"))
+JOB_HISTORY = int(os.getenv("SYNC_JOB_HISTORY", "50")) # Finished jobs kept for /admin/jobs
+WEBHOOK_DEBOUNCE = float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "5"))
+COMPACT_INTERVAL = 3600 # Seconds between snapshot compactions, see sync.compact_snapshots
 
-async def run_sync_cycle():
+def sync_cycle():
+    """Sync the repo and log the outcome. Blocking, never raises."""
     try:
-        result = await asyncio.to_thread(sync_repo) # Non-blocking
+        result = sync_repo()
         if result["status"] == "success":
             logger.info(f"Repo synced to {result['commit_hash']}")
         else:
@@ -19,3 +26,144 @@ async def run_sync_cycle():
     except Exception as e:
         logger.exception(f"Unexpected error during sync: {e}")
         return {"status": "failure", "log": str(e)}
+
+class SyncJob:
+    """One run of the pipeline, and the triggers that were folded into it."""
+
+    def __init__(self, id: int, action: str, reason: str, refresh: bool = False):
+        self.id = id
+        self.action = action    # "sync", "import", "views" or "compact"
+        self.refresh = refresh
+        self.reasons = [reason]
+        self.status = "queued"  # -> "running" -> "success" | "failure"
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        iso = lambda t: t.isoformat() if t else None
+        return {
+            "id": self.id,
+            "action": self.action,
+            "refresh": self.refresh,
+            "status": self.status,
+            "triggers": len(self.reasons),
+            "reasons": self.reasons,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "result": self.result,
+            "error": self.error,
+        }
+
+class SyncPipeline:
+    """
+    Runs the sync -> parse -> import pipeline on a dedicated thread, so
+    Emacs and SQLite work never blocks the request event loop.
+
+    Jobs are executed one at a time in the order they were submitted.
+    Triggers are coalesced: submitting an action that is already queued
+    or running returns that job instead of starting another cycle.
+    Triggers that must see changes made after a running job started
+    (pushes) pass join_running=False and queue behind it instead.
+    """
+
+    def __init__(self, run, history: int = JOB_HISTORY):
+        self.run = run          # Called with the SyncJob, returns its result
+        self.queue = queue.Queue()
+        self.jobs = deque(maxlen=history)
+        self.active = {}        # (action, refresh) -> latest queued or running job
+        self.timers = {}        # action -> pending debounced submit
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.loop, name="sync-pipeline", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout: float = 10):
+        with self.lock:
+            for timer in self.timers.values():
+                timer.cancel()
+            self.timers.clear()
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout)
+            self.thread = None
+
+    def submit(self, action: str = "sync", reason: str = "manual", refresh: bool = False,
+               join_running: bool = True) -> SyncJob:
+        with self.lock:
+            job = self.active.get((action, refresh))
+            if job is not None and (join_running or job.status == "queued"):
+                job.reasons.append(reason)
+                logger.info(f"Trigger '{reason}' joined {action} job {job.id} ({job.status})")
+                return job
+            job = SyncJob(self.next_id, action, reason, refresh)
+            self.next_id += 1
+            self.active[(action, refresh)] = job
+            self.jobs.append(job)
+        self.queue.put(job)
+        return job
+
+    def submit_debounced(self, action: str = "sync", reason: str = "webhook", delay: float = WEBHOOK_DEBOUNCE) -> int:
+        """
+        Submit ACTION once no further call has arrived for DELAY seconds,
+        so a burst of triggers becomes a single job. Returns the number of
+        triggers folded into the pending submit so far.
+        """
+        with self.lock:
+            timer = self.timers.pop(action, None)
+            if timer is not None:
+                timer.cancel()
+            count = timer.count + 1 if timer is not None else 1
+            timer = threading.Timer(delay, self.fire, (action, reason, count))
+            timer.count = count
+            timer.daemon = True
+            self.timers[action] = timer
+        timer.start()
+        return count
+
+    def fire(self, action: str, reason: str, count: int):
+        with self.lock:
+            if self.timers.get(action) is threading.current_thread():
+                del self.timers[action]
+        job = self.submit(action, reason=f"{reason} x{count}" if count > 1 else reason, join_running=False)
+        logger.info(f"Debounced {count} trigger(s) into {action} job {job.id}")
+
+    def get(self, job_id: int):
+        with self.lock:
+            return next((job for job in self.jobs if job.id == job_id), None)
+
+    def recent(self) -> list[SyncJob]:
+        with self.lock:
+            return list(reversed(self.jobs))
+
+    def loop(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            with self.lock:
+                job.status = "running"
+                job.started_at = datetime.now(timezone.utc)
+            try:
+                job.result = self.run(job)
+                job.status = "success"
+            except Exception as e:
+                logger.exception(f"{job.action} job {job.id} failed")
+                job.error = str(e)
+                job.status = "failure"
+            job.finished_at = datetime.now(timezone.utc)
+            with self.lock:
+                if self.active.get((job.action, job.refresh)) is job:
+                    del self.active[(job.action, job.refresh)]
+            job.done.set()
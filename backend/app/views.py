@@ -1,36 +1,152 @@
 import os
+import json
+import hashlib
+import logging
+import threading
+from types import MappingProxyType
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import sexpdata
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, case, delete, func, insert, literal, select
 from sqlalchemy.orm import Session
-from .models import Task
+from .models import Task, TaskTag, ViewEntry, latest_generation
+from .parser import TIMEZONE, local_to_utc
+
+logger = logging.getLogger("org-cal.views")
 
 views_file = os.getenv("VIEWS_FILE")
+VIEWS_POLL_INTERVAL = int(os.getenv("VIEWS_POLL_SECONDS", "5"))
 
 # --- Parsing ---
-def parse_views_file(path: str):
-    """Load all views from a Lisp file into memory."""
-    with open(path, "r") as f:
-        raw = f.read()
-
+def parse_views(raw: str, previous: dict = None):
+    """
+    Parse the contents of a views file. Views whose definition is unchanged
+    from PREVIOUS are reused as they are, compiled query included.
+    """
     sexprs = sexpdata.loads(f"({raw})") # Wrap so that multiple views parse
+    previous = previous or {}
     views = {}
     for expr in sexprs:
         view = parse_view(expr)
+        if not view["token"]:
+            raise ValueError(f"View {view['name']!r} has no :token")
+        if view["token"] in views:
+            raise ValueError(f"Duplicate view token {view['token']!r}")
+        view.version = hashlib.sha256(json.dumps(view, sort_keys=True).encode()).hexdigest()
+        old = previous.get(view["token"])
+        if old is not None and old.version == view.version:
+            view = old
+        else:
+            view.compiled = CompiledView(view) # Raises on unknown filters
         views[view["token"]] = view
     return views
 
+def views_version(views) -> str:
+    """Hash of a set of views, which changes whenever any view is added, removed or redefined."""
+    h = hashlib.sha256()
+    for token in sorted(views):
+        h.update(f"{token}\0{views[token].version}\0".encode())
+    return h.hexdigest()[:32]
+
+def view_meta(view) -> dict:
+    """A view without its calendars: what clients need to label and window it."""
+    return {k: v for k, v in view.items() if k != "calendars"}
+
+class ViewRegistry:
+    """
+    The views currently served, reloaded when the views file changes.
+
+    `views` is a read-only mapping that is replaced as a whole on reload,
+    so a request that reads it once sees one consistent set of views. A
+    file that fails to parse or compile is logged and the previous views
+    stay in place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.views = MappingProxyType({})
+        self.stat = None    # (mtime_ns, size) of the file last read
+        self.digest = None  # SHA-256 of the file last parsed
+        self.lock = threading.Lock()
+
+    def modified(self) -> bool:
+        """Cheap check for whether the file may have changed since the last reload."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) != self.stat
+
+    def reload(self, force: bool = False, before_swap=None) -> set:
+        """
+        Re-parse the file if it changed since the last reload. Returns the
+        tokens of views that were added, removed or redefined.
+        BEFORE_SWAP(views, changed) runs before the new views are served;
+        if it raises, the previous views stay in place.
+        """
+        with self.lock:
+            st = os.stat(self.path)
+            stat = (st.st_mtime_ns, st.st_size)
+            if not force and stat == self.stat:
+                return set()
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            if not force and digest == self.digest:
+                self.stat = stat
+                return set() # Touched, not edited
+            try:
+                views = parse_views(raw.decode(), self.views)
+            except Exception:
+                self.stat = stat # Broken until edited again, no use re-reading it
+                raise
+
+            old = self.views
+            changed = {t for t in old.keys() | views.keys() if old.get(t) is not views.get(t)}
+            if before_swap is not None:
+                before_swap(views, changed)
+            # Only recorded once the swap happened, so a BEFORE_SWAP that
+            # failed (say, on a locked database) is retried on the next poll
+            self.stat = stat
+            self.digest = digest
+            self.views = MappingProxyType(views)
+            return changed
+
+    def poll(self, before_swap=None) -> set:
+        """reload() for the watcher: never raises, logs what changed."""
+        try:
+            changed = self.reload(before_swap=before_swap)
+        except Exception as e:
+            logger.error(f"Views file not reloaded, keeping previous views: {e}")
+            return set()
+        if changed:
+            logger.info(f"Views reloaded: {len(self.views)} view(s), changed: {', '.join(sorted(changed))}")
+        return changed
+
+class View(dict):
+    """
+    A parsed view. Behaves as the plain dict served by the API, and also
+    carries its compiled query in `compiled` and a hash of its definition
+    in `version`.
+    """
+    compiled = None
+    version = None
+
 def parse_view(expr):
     """Parse a (view ...) form into a dict"""
     assert expr[0].value() == "view", "Not a view form"
     meta, children = extract_meta_and_children(expr[1:])
     calendars = [parse_calendar(c, meta.get(":detail", "full")) for c in children]
-    result = {
+    result = View({
         "name": meta.get(":name"),
         "token": meta.get(":token"),
         "detail": meta.get(":detail", "full"),
+        # Default time window of the view's feeds, in days around today
+        "past_days": meta.get(":past-days"),
+        "future_days": meta.get(":future-days"),
         # "queries": [parse_query(c, meta.get(":detail", "full")) for c in children],
         "calendars": calendars
-    }
+    })
     return result
 
 def parse_calendar(expr, detail="full"):
@@ -86,6 +202,11 @@ def extract_meta_and_children(parts):
 
 
 # --- Filter Eval ---
+def day_start(date_str, offset_days=0):
+    """UTC instant of local midnight on DATE_STR, shifted by OFFSET_DAYS."""
+    day = datetime.strptime(str(date_str), "%Y-%m-%d") + timedelta(days=offset_days)
+    return local_to_utc(day.strftime("%Y-%m-%d"))
+
 def eval_filter(expr):
     """Translate filter s-expr into SQLAlchemy condition."""
     # head = expr[0].value() if isinstance(expr[0], sexpdata.Symbol) else expr[0]
@@ -101,7 +222,7 @@ def eval_filter(expr):
         return ~eval_filter(expr[1])
 
     if head == "tag":
-        return Task.tags.like(f"%{expr[1]}%")
+        return Task.id.in_(select(TaskTag.task_id).where(TaskTag.tag == expr[1]))
     if head == "todo":
         return Task.todo == expr[1]
     if head == "kind":
@@ -109,60 +230,167 @@ def eval_filter(expr):
     if head == "file":
         return Task.file == expr[1]
 
+    # Dates are inclusive and local to TIMEZONE, compared as UTC range bounds
     if head == "scheduled_after":
-        return Task.scheduled_start_date >= expr[1]
+        return Task.scheduled_at >= day_start(expr[1])
     if head == "scheduled_before":
-        return Task.scheduled_start_date <= expr[1]
+        return Task.scheduled_at < day_start(expr[1], 1)
     if head == "deadline_after":
-        return Task.deadline_start_date >= expr[1]
+        return Task.deadline_at >= day_start(expr[1])
     if head == "deadline_before":
-        return Task.deadline_start_date <= expr[1]
+        return Task.deadline_at < day_start(expr[1], 1)
 
     raise ValueError(f"Unknown filter operator: {head}")
 
-def get_tasks_for_view(session: Session, views: dict, token: str):
+class CompiledView:
+    """
+    All queries of a view folded into a single SELECT, which materializes
+    the view's entries for a generation into view_entries.
+
+    Every (calendar, query) pair becomes a rule. A task may match several
+    rules; the last one in definition order decides its calendar, detail
+    and color, which the statement picks with a CASE over the rules in
+    reverse. Entries are ordered by the first rule each task matched, the
+    order in which tasks used to appear when queries ran one by one.
+    """
+
+    def __init__(self, view):
+        self.token = view.get("token")
+        self.rules = []   # (calendar name, detail, color) per rule
+        conditions = []
+        for calendar in view.get("calendars", []):
+            calendar_detail = calendar.get("detail", view.get("detail", "NOTHING"))
+            for query in calendar.get("queries", []):
+                self.rules.append((
+                    calendar.get("name"),
+                    query.get("detail", calendar_detail),
+                    calendar.get("color"),
+                ))
+                conditions.append(eval_filter(query["filter"]))
+
+        self.conditions = conditions
+
+    def membership(self, generation: int):
+        """SELECT of this view's view_entries rows for GENERATION, or None."""
+        if not self.conditions:
+            return None
+        indexed = list(enumerate(self.conditions))
+        last_rule = lambda field: case(*[(c, literal(self.rules[i][field])) for i, c in reversed(indexed)])
+        return select(
+            literal(generation),
+            literal(self.token),
+            case(*[(c, i) for i, c in indexed]),
+            Task.id,
+            last_rule(0),
+            last_rule(1),
+            last_rule(2),
+        ).where(Task.generation == generation, or_(*self.conditions))
+
+    def iter_entries(self, session: Session, window=(None, None), yield_per: int = 500):
+        """
+        Yield the view's materialized entries for the current generation
+        while reading rows from the cursor in batches, limited to entries
+        overlapping WINDOW (see resolve_window).
+        """
+        statement = (
+            select(Task, ViewEntry.calendar, ViewEntry.detail, ViewEntry.color)
+            .join(ViewEntry, ViewEntry.task_id == Task.id)
+            .where(ViewEntry.generation == latest_generation(), ViewEntry.token == self.token)
+            .order_by(ViewEntry.position, ViewEntry.task_id)
+        )
+        if window != (None, None):
+            statement = statement.where(window_clause(*window))
+        statement = statement.execution_options(yield_per=yield_per)
+        for task, calendar_name, detail, color in session.execute(statement):
+            yield {
+                "task": task,
+                "detail": detail,
+                "category": calendar_name,
+                "color": color,
+            }
+
+    def entries(self, session: Session, window=(None, None)):
+        return list(self.iter_entries(session, window))
+
+def materialize_views(session: Session, views, generation: int, tokens=None):
+    """
+    Write the view_entries of GENERATION for TOKENS (every view when None),
+    evaluating each view's filters once. Tokens no longer in VIEWS just
+    lose their rows. The caller owns the transaction.
+    """
+    stale = delete(ViewEntry).where(ViewEntry.generation == generation)
+    if tokens is not None:
+        stale = stale.where(ViewEntry.token.in_(list(tokens)))
+    session.execute(stale)
+    columns = ["generation", "token", "position", "task_id", "calendar", "detail", "color"]
+    for token in (views.keys() if tokens is None else tokens):
+        view = views.get(token)
+        if view is None:
+            continue
+        compiled = getattr(view, "compiled", None) or CompiledView(view)
+        membership = compiled.membership(generation)
+        if membership is not None:
+            session.execute(insert(ViewEntry).from_select(columns, membership))
+
+def resolve_window(view, start=None, end=None, past_days=None, future_days=None):
+    """
+    Resolve a feed's time window to (lo, hi) UTC bounds, either of which may
+    be None for no limit. Explicit START/END dates win over PAST_DAYS /
+    FUTURE_DAYS, which win over the view's own :past-days / :future-days.
+    Bounds fall on local midnights, so the window only moves once a day.
+    """
+    view = view or {}
+    if past_days is None:
+        past_days = view.get("past_days")
+    if future_days is None:
+        future_days = view.get("future_days")
+    today = datetime.now(ZoneInfo(TIMEZONE)).date()
+
+    lo = hi = None
+    if start is not None:
+        lo = day_start(start)
+    elif past_days is not None:
+        lo = day_start(today, -int(past_days))
+    if end is not None:
+        hi = day_start(end, 1)
+    elif future_days is not None:
+        hi = day_start(today, int(future_days) + 1)
+    return lo, hi
+
+def window_clause(lo, hi):
+    """
+    Entries overlapping [LO, HI). Undated entries are always kept, and
+    repeating entries are kept from their first occurrence onward. Tasks
+    are also kept when their deadline, the DUE of their VTODO, falls in
+    the window, even if they are scheduled outside it.
+    """
+    conditions = []
+    due = [Task.kind == "task"]
+    if hi is not None:
+        conditions.append(Task.start_at < hi)
+        due.append(Task.deadline_at < hi)
+    if lo is not None:
+        repeats = or_(
+            Task.ts_repeater_type.isnot(None),
+            Task.scheduled_repeater_type.isnot(None),
+            Task.deadline_repeater_type.isnot(None),
+        )
+        conditions.append(or_(repeats, func.coalesce(Task.end_at, Task.start_at) >= lo))
+        due.append(Task.deadline_at >= lo)
+    return or_(Task.start_at.is_(None), and_(*conditions), and_(*due))
+
+def get_tasks_for_view(session: Session, views: dict, token: str, window=(None, None)):
     """Fetch all tasks/events for a given view, tagging each with its calendar name."""
     view = views.get(token)
     if not view:
         return []
+    compiled = getattr(view, "compiled", None) or CompiledView(view)
+    return compiled.entries(session, window)
 
-    results = []
-    seen = {}  # task.id -> (task, detail, calendar_name)
-    # Rule: Keep higher priorities
-    priority = {"full": 1, "summary-only": 2, "time-only": 3}
-
-    for calendar in view.get("calendars", []):
-        calendar_name = calendar.get("name")
-        calendar_detail = calendar.get("detail", view.get("detail", "NOTHING"))
-        print(calendar_name + ": " + calendar_detail)
-        calendar_color = calendar.get("color")
-
-        for query in calendar.get("queries", []):
-            condition = eval_filter(query["filter"])
-            q = session.query(Task).filter(condition)
-            tasks = q.all()
-
-            for t in tasks:
-                entry = {
-                    "task": t,
-                    "detail": query.get("detail", calendar_detail),
-                    "category": calendar_name,
-                    "color": calendar_color,
-                }
-
-                # If already seen, determine overwrite
-                if t.id in seen:
-                    # Last calendar wins OR higher detail wins
-                    current = seen[t.id]
-                    if priority[entry["detail"]] > priority[current["detail"]]:
-                        seen[t.id] = entry
-                    else:
-                        # same or lesser detail → last-defined calendar wins anyway
-                        seen[t.id] = entry
-                else:
-                    seen[t.id] = entry
-
-    result = list(seen.values())
-    # print(result)
-    return result
-
+def iter_tasks_for_view(session: Session, views: dict, token: str, window=(None, None)):
+    """Like get_tasks_for_view, but yields entries as they are read."""
+    view = views.get(token)
+    if not view:
+        return iter(())
+    compiled = getattr(view, "compiled", None) or CompiledView(view)
+    return compiled.iter_entries(session, window)
@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Import the app package as the container does, from the backend directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite database in place of /data/db.sqlite, as a sessionmaker."""
+    from app import db as app_db, parser
+    import app.models # Registers the tables on Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    app_db.Base.metadata.create_all(engine)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for module in (app_db, parser):
+        monkeypatch.setattr(module, "SessionLocal", session_local)
+    yield session_local
+    engine.dispose()
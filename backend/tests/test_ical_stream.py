@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+from icalendar import Calendar
+
+from app.main import ical_stream, make_event, make_todo
+
+DTSTAMP = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+def components():
+    """A mix of events and todos, with summaries long enough to be folded."""
+    return [
+        make_event("Short", "2026-03-01", "10:00", "2026-03-01", "11:00", uid="event-1", dtstamp=DTSTAMP),
+        make_event(
+            "A meeting, with; characters to escape and a title well past seventy-five octets " * 3,
+            "2026-03-02", None, uid="event-2", dtstamp=DTSTAMP, rrule={"freq": "weekly", "interval": 2},
+        ),
+        make_event("Réunion à l'école — été " * 8, "2026-03-03", "09:30", uid="event-3", dtstamp=DTSTAMP),
+        make_todo("Pay rent", "2026-04-01", None, "TODO", uid="todo-1", dtstamp=DTSTAMP),
+        make_todo("x" * 200, "2026-04-02", "08:15", "DONE", uid="todo-2", dtstamp=DTSTAMP),
+    ]
+
+def to_ical(components):
+    """The feed as it was built before streaming: one Calendar serialized whole."""
+    cal = Calendar()
+    cal.add("prodid", "-//Org Parser//EN")
+    cal.add("version", "2.0")
+    for component in components:
+        cal.add_component(component)
+    return cal.to_ical()
+
+def test_matches_calendar_to_ical():
+    streamed = b"".join(ical_stream(components()))
+    assert streamed == to_ical(components())
+    # The long summaries really were folded
+    assert b"\r\n " in streamed
+    assert all(len(line) <= 75 for line in streamed.split(b"\r\n"))
+
+def test_empty_calendar():
+    assert b"".join(ical_stream([])) == to_ical([])
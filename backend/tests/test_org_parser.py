@@ -0,0 +1,29 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.org_parser import parse_org, parse_org_path
+from app.parser import OrgParserWorker
+
+CORPUS = sorted((Path(__file__).parent / "org").glob("*.org"))
+
+@pytest.fixture(scope="module")
+def emacs():
+    if shutil.which("emacs") is None:
+        pytest.skip("emacs is not installed")
+    worker = OrgParserWorker()
+    yield worker
+    worker.stop()
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda p: p.name)
+def test_expected_output(path):
+    """Each corpus file parses to the entries recorded next to it, with "file" as its name."""
+    expected = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+    assert parse_org(path.read_text(encoding="utf-8"), path.name) == expected
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda p: p.name)
+def test_matches_emacs(emacs, path):
+    """The native parser extracts exactly what org-to-json.el does."""
+    assert parse_org_path(str(path)) == emacs.parse(str(path))
@@ -0,0 +1,36 @@
+import pytest
+
+from app.parse_cache import ParseCache
+
+@pytest.fixture
+def cache(tmp_path):
+    script = tmp_path / "parser.el"
+    script.write_text("(parser)")
+    return ParseCache(script, tmp_path / "cache", size=2)
+
+def test_entry_stored_once_read_to_the_end(cache):
+    tasks = [{"title": "a"}, {"title": "b"}]
+    stream = cache.record("k", iter(tasks))
+    assert next(stream) == tasks[0]
+    assert cache.get("k") is None
+    assert list(stream) == tasks[1:]
+    assert list(cache.get("k")) == tasks
+
+def test_nothing_stored_for_failed_or_abandoned_streams(cache):
+    def failing():
+        yield {"title": "a"}
+        raise RuntimeError("parse error")
+
+    with pytest.raises(RuntimeError):
+        list(cache.record("failed", failing()))
+    abandoned = cache.record("abandoned", iter([{"title": "a"}, {"title": "b"}]))
+    next(abandoned)
+    abandoned.close()
+    assert cache.get("failed") is None and cache.get("abandoned") is None
+    assert list(cache.directory.iterdir()) == []
+
+def test_least_recently_used_evicted(cache):
+    for key in ("a", "b", "c"):
+        list(cache.record(key, iter([{"title": key}])))
+    assert cache.get("a") is None
+    assert not cache.contains("a") and cache.contains("c")
@@ -0,0 +1,59 @@
+from sqlalchemy import func, select
+
+from app.models import Task, TaskTag, current_generation
+from app.parser import imported_commit, replace_tasks
+
+def file_tasks(file: str, count: int, version: int = 0) -> list[dict]:
+    return [
+        {"title": f"{file} {i} v{version}", "file": file, "kind": "task", "todo": "TODO", "tags": [f"{file}-{i}"]}
+        for i in range(count)
+    ]
+
+def test_incremental_imports_keep_ids_bounded(db):
+    files = [f"/org/{n}.org" for n in range(10)]
+    replace_tasks([(f, file_tasks(f, 100)) for f in files])
+    for cycle in range(1, 200):
+        changed = files[cycle % len(files)]
+        replace_tasks([(changed, file_tasks(changed, 100, cycle))], files=[changed])
+
+    session = db()
+    try:
+        generation = current_generation(session)
+        assert session.scalar(select(func.count()).where(Task.generation == generation)) == 1000
+        # Each import shifts ids by about one generation's worth of rows
+        assert session.scalar(select(func.max(Task.id))) < 1000 * 2 * 200
+        # Every task still has exactly its own tag
+        rows = session.execute(
+            select(Task.file, Task.title, TaskTag.tag)
+            .join(TaskTag, TaskTag.task_id == Task.id)
+            .where(Task.generation == generation)
+        ).all()
+        assert len(rows) == 1000
+        for file, title, tag in rows:
+            assert tag == f"{file}-{title.split()[1]}"
+    finally:
+        session.close()
+
+def failing_after(tasks: list[dict], count: int):
+    yield from tasks[:count]
+    raise RuntimeError("Emacs parser exited while parsing")
+
+def test_failed_stream_keeps_previous_rows(db):
+    replace_tasks([("/a.org", file_tasks("/a.org", 3)), ("/b.org", file_tasks("/b.org", 3))])
+    errors = {}
+    imported = replace_tasks(
+        [("/a.org", iter(file_tasks("/a.org", 3, 1))), ("/b.org", failing_after(file_tasks("/b.org", 3, 1), 2))],
+        files=["/a.org", "/b.org"],
+        failed_files=errors,
+    )
+    assert imported == 3
+    assert list(errors) == ["/b.org"]
+
+    session = db()
+    try:
+        generation = current_generation(session)
+        titles = sorted(session.scalars(select(Task.title).where(Task.generation == generation)))
+        assert titles == [f"/a.org {i} v1" for i in range(3)] + [f"/b.org {i} v0" for i in range(3)]
+        assert imported_commit() == (None, ["/b.org"])
+    finally:
+        session.close()
@@ -0,0 +1,26 @@
+from sqlalchemy import select
+
+from app.models import Task
+from app.parser import replace_tasks
+from app.views import day_start, window_clause
+
+def titles_in_window(db, start: str, end: str) -> list[str]:
+    session = db()
+    try:
+        statement = select(Task.title).where(window_clause(day_start(start), day_start(end, 1)))
+        return sorted(session.scalars(statement))
+    finally:
+        session.close()
+
+def test_task_due_in_window(db):
+    replace_tasks([("/a.org", [
+        {"title": "due inside", "file": "/a.org", "kind": "task", "todo": "TODO",
+         "scheduled_start_date": "2026-09-01", "deadline_start_date": "2026-10-30"},
+        {"title": "due after", "file": "/a.org", "kind": "task", "todo": "TODO",
+         "scheduled_start_date": "2026-09-01", "deadline_start_date": "2026-12-01"},
+        {"title": "scheduled inside", "file": "/a.org", "kind": "task", "todo": "TODO",
+         "scheduled_start_date": "2026-10-20"},
+        {"title": "event before", "file": "/a.org", "kind": "event",
+         "timestamp_start_date": "2026-09-01", "deadline_start_date": "2026-10-30"},
+    ])])
+    assert titles_in_window(db, "2026-10-16", "2026-11-15") == ["due inside", "scheduled inside"]
@@ -1,14 +1,29 @@
 from fastapi import Request, HTTPException, status
 from fastapi.responses import RedirectResponse
-from itsdangerous import URLSafeTimedSerializer, BadSignature
-import httpx
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from itsdangerous.encoding import base64_decode, bytes_to_int
+import logging
 import os
+import time
+
+from .backend import client
 
 # Reuse same SEsSION_COOKIE name for consistency
 SESSION_COOKIE = "session"
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me")
 serializer = URLSafeTimedSerializer(SECRET_KEY)
-BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000")
+# Only a key that was actually configured can vouch for a session: the
+# default is public, so anyone could sign cookies with it
+LOCAL_VERIFY = SECRET_KEY not in ("", "change-me")
+SESSION_MAX_AGE = 3600 * 12 # Same 12 hour session as the backend
+SESSION_CACHE_SECONDS = int(os.getenv("SESSION_CACHE_SECONDS", "300"))
+SESSION_CACHE_SIZE = 1024
+
+logger = logging.getLogger("org-cal.frontend")
+
+# Cookies the backend accepted but this process could not verify itself,
+# mapped to the time (unix) until which they are trusted
+_verified = {}
 
 def is_logged_in(request: Request) -> bool:
     """Check if a session cookie exists."""
@@ -32,14 +47,7 @@ async def require_login(request: Request):
             headers={"Location": "/login"},
         )
 
-    # Verify session with backend
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{BACKEND_URL}/verify-session",
-            cookies = {SESSION_COOKIE: session_cookie},
-        )
-
-    if resp.status_code != 200:
+    if not await session_valid(session_cookie):
         raise HTTPException(
             status_code=status.HTTP_302_FOUND,
             headers={"Location": "/login"},
@@ -47,6 +55,60 @@ async def require_login(request: Request):
 
     return True
 
+def verify_session_locally(cookie: str):
+    """
+    Check a session cookie's signature and age with the shared SECRET_KEY.
+    Returns True or False, or None if the signature does not match (the
+    cookie is forged, or this frontend does not share the backend's key),
+    and always None when SECRET_KEY is unset or left at its default.
+    """
+    if not LOCAL_VERIFY:
+        return None
+    try:
+        data = serializer.loads(cookie, max_age=SESSION_MAX_AGE)
+    except SignatureExpired:
+        return False
+    except BadSignature:
+        return None
+    return isinstance(data, dict) and data.get("role") == "admin"
+
+def session_expiry(cookie: str):
+    """Unix time the session expires, read from the cookie's (unverified) timestamp."""
+    try:
+        return bytes_to_int(base64_decode(cookie.rsplit(".", 2)[1])) + SESSION_MAX_AGE
+    except Exception:
+        return None
+
+async def session_valid(cookie: str) -> bool:
+    """
+    Verify a session cookie without a backend round trip when possible.
+    Cookies that fail local verification are checked with the backend, and
+    those it accepts are remembered for SESSION_CACHE_SECONDS, never past
+    the end of the session.
+    """
+    valid = verify_session_locally(cookie)
+    if valid is not None:
+        return valid
+
+    now = time.time()
+    if _verified.get(cookie, 0) > now:
+        return True
+
+    resp = await client.get(
+        "/verify-session",
+        headers = {"cookie": f"{SESSION_COOKIE}={cookie}"},
+    )
+    if resp.status_code != 200:
+        _verified.pop(cookie, None)
+        return False
+
+    if not _verified:
+        logger.warning("Session verified by the backend only, is SECRET_KEY the same on both sides?")
+    if len(_verified) >= SESSION_CACHE_SIZE:
+        _verified.clear()
+    _verified[cookie] = min(now + SESSION_CACHE_SECONDS, session_expiry(cookie) or now)
+    return True
+
 def clear_session(response: RedirectResponse):
     """Helper to clear session cookie."""
     response.delete_cookie(SESSION_COOKIE)
@@ -0,0 +1,22 @@
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import httpx
+import os
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000") # Internal url to proxy backend requests to
+BACKEND_MAX_CONNECTIONS = int(os.getenv("BACKEND_MAX_CONNECTIONS", "100"))
+BACKEND_KEEPALIVE_CONNECTIONS = int(os.getenv("BACKEND_KEEPALIVE_CONNECTIONS", "20"))
+
+# One client for the lifetime of the app, so requests to the backend reuse
+# pooled keep-alive connections instead of opening a new one each time.
+# Closed on shutdown, see main.py. The client is shared between users, so
+# its cookie jar accepts nothing: session cookies are always passed per request.
+client = httpx.AsyncClient(
+    base_url=BACKEND_URL,
+    follow_redirects=True,
+    cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    limits=httpx.Limits(
+        max_connections=BACKEND_MAX_CONNECTIONS,
+        max_keepalive_connections=BACKEND_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=30,
+    ),
+)
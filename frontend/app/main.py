@@ -1,17 +1,27 @@
 
-from fastapi import FastAPI, Request, Form, Depends, Response
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, Form, Depends, HTTPException
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from starlette.background import BackgroundTask
 import httpx
-import requests
-import os
 
 from .config import config
 from .auth import require_login, clear_session
+from .backend import client
+from .view_meta import view_cache
 
 app = FastAPI()
 templates = Jinja2Templates(directory="app/templates")
-BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000") # Internal url to proxy backend requests to
+
+# Headers that describe a single connection, and are not forwarded by the proxy
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host",
+}
+
+@app.on_event("shutdown")
+async def close_client():
+    await client.aclose()
 
 # === Auth and Login/Logout ===
 
@@ -29,11 +39,10 @@ async def login(request: Request, password: str=Form(...)):
     POSTs the password to abckend /login (BasicAuth).
     Mirrors any Set-Cookie headers back to browser.
     """
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        resp = await client.post(
-            f"{BACKEND_URL}/login",
-            auth=("admin", password)
-        )
+    resp = await client.post(
+        "/login",
+        auth=("admin", password)
+    )
 
     if resp.status_code == 200:
         response = RedirectResponse(url="/home", status_code=303)
@@ -93,44 +102,38 @@ async def save_settings(request: Request, _: bool = Depends(require_login)):
     config.update_from_form(form)
     return RedirectResponse(url="/settings", status_code=303)
 
-def get_view_name(token: str):
-        try:
-            response = requests.get(f"{BACKEND_URL}/view/{token}")
-            response.raise_for_status()
-
-            data = response.json()
-            name = data.get("name")
-            print(name)
-
-            if name is None:
-                raise HTTPException(status_code=404, details="Name not found in response data")
+async def get_view_name(token: str):
+    """Name of the view TOKEN, from the cached view metadata."""
+    try:
+        view = await view_cache.get(token)
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail=str(e))
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=503, detail=f"Error connecting to backend: {str(e)}")
 
-            return name
-
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=e.response.status_code, detail=str(e))
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=503, detial=f"Error connecting to backend: {str(e)}")
+    if view is None or view.get("name") is None:
+        raise HTTPException(status_code=404, detail="View not found")
+    return view["name"]
 
 @app.get("/calendar/{token}")
-def calendar_view(request: Request, token: str):
-    name = get_view_name(token)
+async def calendar_view(request: Request, token: str):
+    name = await get_view_name(token)
     return templates.TemplateResponse(
         "calendar_view.html",
         {"request": request, "token": token, "backend_calendar_url": f"/proxy/calendar/{token}.ics", "calendar_name": name}
     )
 
 @app.get("/calendar/{token}/events")
-def calendar_events(request: Request, token: str):
-    name = get_view_name(token)    
+async def calendar_events(request: Request, token: str):
+    name = await get_view_name(token)
     return templates.TemplateResponse(
         "calendar_events.html",
         {"request": request, "token": token, "backend_calendar_url": f"/proxy/calendar/{token}.ics", "calendar_name": name}
     )
 
 @app.get("/calendar/{token}/tasks")
-def calendar_tasks(request: Request, token: str):
-    name = get_view_name(token)    
+async def calendar_tasks(request: Request, token: str):
+    name = await get_view_name(token)
     return templates.TemplateResponse(
         "calendar_tasks.html",
         {"request": request, "token": token, "backend_calendar_url": f"/proxy/calendar/{token}.ics", "calendar_name": name}
@@ -140,38 +143,41 @@ def calendar_tasks(request: Request, token: str):
 async def proxy(request: Request, path: str):
     """
     General-purpose proxy that forwards requests under /proxy/*
-    to the backend container, preserving method, headers, and body.
-    """
-    # Construct the full backend url
-    target_url = f"{BACKEND_URL}/{path}"
-
-    # Forward original headers (minus host)
-    headers = dict(request.headers)
-    headers.pop("host", None)
+    to the backend container, preserving method, query, headers, and body.
 
-    # Add frontend cookies to backend request
-    if "cookie" in request.headers:
-        headers["cookie"] = request.headers["cookie"]
+    Bodies are streamed through in both directions, so large feeds are
+    proxied without being held in memory. Conditional headers (If-None-Match)
+    reach the backend unchanged, and its 304s come back the same way.
+    """
+    # Forward original headers (cookies and conditional headers included)
+    headers = {k: v for k, v in request.headers.items() if k not in HOP_BY_HOP_HEADERS}
 
     # Forward request body, if any
-    body = await request.body()
-
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        backend_response = await client.request(
-            request.method,
-            target_url,
-            headers=headers,
-            content=body
-        )
-
-    response_headers = dict(backend_response.headers)
-    if "set-cookie" in response_headers:
-        response_headers["set-cookie"] = response_headers["set-cookie"]
-
-    # Mirror the backend response
-    return Response(
-        content = backend_response.content,
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    backend_request = client.build_request(
+        request.method,
+        f"/{path}",
+        params=request.query_params.multi_items(),
+        headers=headers,
+        content=request.stream() if has_body else None,
+    )
+    try:
+        backend_response = await client.send(backend_request, stream=True)
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=502, detail=f"Error connecting to backend: {str(e)}")
+    view_cache.observe(backend_response.headers)
+
+    # Mirror the backend response. Set-Cookie may appear more than once
+    response_headers = {
+        k: v for k, v in backend_response.headers.items()
+        if k not in HOP_BY_HOP_HEADERS and k != "set-cookie"
+    }
+    response = StreamingResponse(
+        backend_response.aiter_raw(), # Still encoded, matching the forwarded Content-Encoding
         status_code = backend_response.status_code,
         headers = response_headers,
-        media_type = backend_response.headers.get("content-type")
+        background = BackgroundTask(backend_response.aclose),
     )
+    for cookie in backend_response.headers.get_list("set-cookie"):
+        response.headers.append("set-cookie", cookie)
+    return response
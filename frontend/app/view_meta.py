@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+
+from .auth import LOCAL_VERIFY, SESSION_COOKIE, serializer
+from .backend import client
+
+VIEW_CACHE_SECONDS = int(os.getenv("VIEW_CACHE_SECONDS", "60"))
+VIEWS_VERSION_HEADER = "X-Views-Version"
+
+class ViewMetaCache:
+    """
+    View metadata (name, detail, default window) by token, fetched from the
+    backend's /views/meta in one request and kept for TTL seconds.
+
+    Entries are revalidated with the ETag once they are stale, and dropped
+    early when a backend response carries a different X-Views-Version (see
+    observe), so edits to the views file show up on the next page load.
+    If /views/meta is refused (the frontend does not share the backend's
+    SECRET_KEY, or has none configured), views are looked up one token at
+    a time instead.
+    """
+
+    def __init__(self, ttl: int = VIEW_CACHE_SECONDS):
+        self.ttl = ttl
+        self.views = {}         # token -> metadata
+        self.etag = None
+        self.version = None     # X-Views-Version the cache was filled at
+        self.fetched_at = float("-inf")
+        self.bulk = LOCAL_VERIFY # False once /views/meta has been refused, or without a key to sign for it
+        self.lock = asyncio.Lock()
+
+    def fresh(self) -> bool:
+        return time.monotonic() - self.fetched_at < self.ttl
+
+    def observe(self, headers):
+        """Expire the cache if HEADERS (of any backend response) show the views changed."""
+        version = headers.get(VIEWS_VERSION_HEADER)
+        if version and self.version and version != self.version:
+            self.fetched_at = float("-inf")
+
+    async def refresh(self):
+        headers = {"cookie": f"{SESSION_COOKIE}={serializer.dumps({'role': 'admin'})}"}
+        if self.etag:
+            headers["if-none-match"] = self.etag
+        resp = await client.get("/views/meta", headers=headers)
+        if resp.status_code in (401, 403):
+            self.bulk = False
+            return
+        if resp.status_code != 304:
+            resp.raise_for_status()
+            self.views = resp.json()
+            self.etag = resp.headers.get("etag")
+        self.version = resp.headers.get(VIEWS_VERSION_HEADER)
+        self.fetched_at = time.monotonic()
+
+    async def fetch_one(self, token: str):
+        resp = await client.get(f"/view/{token}")
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        self.observe(resp.headers)
+        if not self.fresh():
+            self.views = {}
+            self.version = resp.headers.get(VIEWS_VERSION_HEADER)
+            self.fetched_at = time.monotonic()
+        self.views[token] = resp.json()
+        return self.views[token]
+
+    async def get(self, token: str):
+        """Metadata of the view TOKEN, or None if there is no such view."""
+        if self.fresh() and token in self.views:
+            return self.views[token]
+        async with self.lock: # One refresh at a time, others wait for its result
+            if self.bulk and not self.fresh():
+                await self.refresh()
+            if self.bulk:
+                return self.views.get(token)
+            if self.fresh() and token in self.views:
+                return self.views[token]
+            return await self.fetch_one(token)
+
+view_cache = ViewMetaCache()